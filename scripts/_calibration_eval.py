@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+校准验证共用的评估内核
+validate_calibration.py / validate_calibration_cv.py 各自维护一份
+几乎相同的evaluate_predictions容易改一处漏一处，统一收到这里
+"""
+import numpy as np
+
+# Numba可以把全部归约熔成对y/p的单趟扫描（8个累加器一个循环跑完），
+# 没装时走下面的NumPy广播路径，结果一致
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# 评估的盘口线（列序固定：215/220/225）
+LINES = np.array([215.0, 220.0, 225.0])
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _eval_kernel(y, p):
+        n = len(y)
+        correct_215 = correct_220 = correct_225 = 0
+        n_hc = correct_hc = 0
+        sum_abs_err = 0.0
+        sum_err = 0.0
+        for i in range(n):
+            yi = y[i]
+            pi = p[i]
+            err = yi - pi
+            sum_err += err
+            sum_abs_err += abs(err)
+            over_215 = pi > 215.0
+            correct_215 += (yi > 215.0) == over_215
+            correct_220 += (yi > 220.0) == (pi > 220.0)
+            correct_225 += (yi > 225.0) == (pi > 225.0)
+            if abs(pi - 215.0) / 215.0 * 100.0 > 5.0:
+                n_hc += 1
+                correct_hc += (yi > 215.0) == over_215
+        return (correct_215, correct_220, correct_225,
+                n_hc, correct_hc, sum_abs_err, sum_err)
+
+def evaluate_np(y, p, y_gt=None):
+    """评估预测准确率和ROI
+
+    y/p为ndarray；y侧的(n,3)布尔矩阵在原始/校准两次评估里完全一样，
+    可由调用方预计算一次传入复用（仅NumPy路径会用到）
+    """
+    if njit is not None:
+        n = len(y)
+        (correct_215, correct_220, correct_225,
+         n_hc, correct_hc, sum_abs_err, sum_err) = _eval_kernel(
+            np.ascontiguousarray(y, dtype=np.float64),
+            np.ascontiguousarray(p, dtype=np.float64))
+        # 除法只做一次，三个准确率都乘同一个倒数
+        inv_n = 100.0 / n
+        return {
+            'accuracy_215': correct_215 * inv_n,
+            'accuracy_220': correct_220 * inv_n,
+            'accuracy_225': correct_225 * inv_n,
+            'high_conf_games': n_hc,
+            'high_conf_accuracy': correct_hc / n_hc * 100 if n_hc > 0 else 0,
+            'roi': (correct_hc - n_hc) / n_hc * 95 if n_hc > 0 else 0,  # -5% vig
+            'mae': sum_abs_err / n,
+            'avg_error': sum_err / n
+        }
+
+    if y_gt is None:
+        y_gt = y[:, None] > LINES
+
+    error = y - p
+
+    # 一次广播比较算完全部盘口线（单趟扫描，不再逐线三遍）
+    acc = (y_gt == (p[:, None] > LINES)).mean(axis=0) * 100
+    accuracy_215, accuracy_220, accuracy_225 = acc
+
+    # 高信心下注模拟（>5%）：同一组ndarray上做布尔mask，
+    # 不建confidence列、不切片.copy()
+    hc_mask = np.abs(p - 215) / 215 * 100 > 5
+    n_hc = int(hc_mask.sum())
+
+    if n_hc > 0:
+        correct_hc = int((y_gt[hc_mask, 0] == (p[hc_mask] > 215)).sum())
+        accuracy_hc = correct_hc / n_hc * 100
+        roi_hc = (correct_hc - n_hc) / n_hc * 95  # -5% vig
+    else:
+        accuracy_hc = 0
+        roi_hc = 0
+
+    return {
+        'accuracy_215': accuracy_215,
+        'accuracy_220': accuracy_220,
+        'accuracy_225': accuracy_225,
+        'high_conf_games': n_hc,
+        'high_conf_accuracy': accuracy_hc,
+        'roi': roi_hc,
+        'mae': np.abs(error).mean(),
+        'avg_error': error.mean()  # 平均偏差（正=高估，负=低估）
+    }
+
+def sweep_calibration(y, p, deltas=None):
+    """对一组校准偏移量做向量化扫描，返回每个偏移的MAE
+
+    err矩阵一次广播建成(N, |deltas|)的float32块，按axis=0归约；
+    比逐个偏移手动试快且一遍找到最优值
+    """
+    if deltas is None:
+        deltas = np.arange(-5.0, 5.0, 0.1)
+    err = (y.astype(np.float32)[:, None]
+           - (p.astype(np.float32)[:, None] + deltas.astype(np.float32)))
+    return deltas, np.abs(err).mean(axis=0)
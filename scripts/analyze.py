@@ -9,6 +9,17 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / 'data' / 'raw'
 
+# 已知schema，显式声明dtype跳过read_csv的两遍类型推断；
+# 小整型/float32也减少下游rolling要搬的字节数
+GAMES_DTYPES = {
+    'TEAM_ABBREVIATION': 'category',
+    'MATCHUP': 'string',
+    'PTS': 'int16',
+    'OPP_PTS': 'int16',
+    'FG_PCT': 'float32',
+    'REB': 'int16',
+}
+
 def load_games(season='2024-25'):
     """加载比赛数据"""
     filepath = DATA_DIR / f'games_{season}.csv'
@@ -17,18 +28,23 @@ def load_games(season='2024-25'):
         print("请先运行: python scripts/create_mock_data.py")
         return None
     
-    df = pd.read_csv(filepath)
+    # 数据脚本落的parquet副本优先：零解析且dtype已定
+    parquet_path = filepath.with_suffix('.parquet')
+    if parquet_path.exists():
+        df = pd.read_parquet(parquet_path)
+    else:
+        df = pd.read_csv(filepath, dtype=GAMES_DTYPES)
     print(f"📊 加载了 {len(df)} 行数据 ({len(df)//2} 场比赛)")
     return df
 
-def analyze_totals(df):
+def analyze_totals(game_totals):
     """分析总分分布"""
     print("\n" + "="*70)
     print("📈 总分分布分析")
     print("="*70)
     
-    # 每场比赛的总分（合并主客队）
-    totals = df.groupby('GAME_ID')['PTS'].sum()
+    # 每场比赛的总分（main里一次groupby算好，两个分析共用）
+    totals = game_totals['TOTAL']
     
     print(f"\n📊 总分统计:")
     print(f"  平均总分: {totals.mean():.1f}")
@@ -41,9 +57,12 @@ def analyze_totals(df):
     print(f"\n📊 总分区间分布:")
     bins = [0, 200, 210, 220, 230, 240, 300]
     labels = ['<200', '200-210', '210-220', '220-230', '230-240', '240+']
-    counts = pd.cut(totals, bins=bins, labels=labels).value_counts().sort_index()
-    
-    for label, count in counts.items():
+    # searchsorted + bincount一次C pass分桶，免去pd.cut的Categorical构造
+    # （side='left'对应pd.cut默认的右闭区间）
+    idx = np.searchsorted(np.asarray(bins[1:]), totals.to_numpy(), side='left')
+    counts = np.bincount(idx, minlength=len(labels))
+
+    for label, count in zip(labels, counts):
         pct = count / len(totals) * 100
         print(f"  {label:10s}: {count:3d} 场 ({pct:5.1f}%)")
     
@@ -55,7 +74,7 @@ def analyze_team_scoring(df):
     print("🏀 球队得分分析")
     print("="*70)
     
-    team_stats = df.groupby('TEAM_ABBREVIATION').agg({
+    team_stats = df.groupby('TEAM_ABBREVIATION', observed=True).agg({
         'PTS': ['mean', 'std', 'min', 'max', 'count']
     }).round(1)
     
@@ -67,19 +86,12 @@ def analyze_team_scoring(df):
     
     return team_stats
 
-def analyze_over_under_strategy(df):
+def analyze_over_under_strategy(game_totals):
     """分析简单的Over/Under策略"""
     print("\n" + "="*70)
     print("🎯 简单策略回测")
     print("="*70)
     
-    # 计算每场比赛总分
-    game_totals = df.groupby('GAME_ID').agg({
-        'PTS': 'sum',
-        'GAME_DATE': 'first'
-    }).reset_index()
-    game_totals.columns = ['GAME_ID', 'TOTAL', 'DATE']
-    
     # 设定盘口线（通常220左右）
     line = 220
     
@@ -123,14 +135,19 @@ def main():
     if df is None:
         return
     
+    # 一次groupby同时算每场总分和日期，两个分析共用（省掉重复的hash聚合）
+    game_totals = df.groupby('GAME_ID', sort=False).agg(
+        TOTAL=('PTS', 'sum'), DATE=('GAME_DATE', 'first')
+    ).reset_index()
+
     # 分析总分
-    totals = analyze_totals(df)
+    totals = analyze_totals(game_totals)
     
     # 分析球队得分
     team_stats = analyze_team_scoring(df)
     
     # 简单策略回测
-    analyze_over_under_strategy(df)
+    analyze_over_under_strategy(game_totals)
     
     print("\n" + "="*70)
     print("✅ 分析完成")
@@ -12,6 +12,17 @@ RAW_DIR = DATA_DIR / 'raw'
 FEATURES_DIR = DATA_DIR / 'features'
 FEATURES_DIR.mkdir(parents=True, exist_ok=True)
 
+# 已知schema，显式声明dtype跳过read_csv的两遍类型推断；
+# 小整型/float32也减少下游rolling要搬的字节数
+GAMES_DTYPES = {
+    'TEAM_ABBREVIATION': 'category',
+    'MATCHUP': 'string',
+    'PTS': 'int16',
+    'OPP_PTS': 'int16',
+    'FG_PCT': 'float32',
+    'REB': 'int16',
+}
+
 def load_games(season='2024-25'):
     """加载比赛数据"""
     # 优先使用清洗后的真实数据
@@ -21,7 +32,13 @@ def load_games(season='2024-25'):
     else:
         filepath = RAW_DIR / f'games_{season}.csv'
     
-    df = pd.read_csv(filepath)
+    # 数据脚本落的parquet副本优先：零解析且dtype已定
+    parquet_path = filepath.with_suffix('.parquet')
+    if parquet_path.exists():
+        df = pd.read_parquet(parquet_path)
+        filepath = parquet_path
+    else:
+        df = pd.read_csv(filepath, dtype=GAMES_DTYPES)
     print(f"📊 加载了 {len(df)//2} 场比赛 (来源: {filepath.name})")
     return df
 
@@ -42,17 +59,17 @@ def build_team_rolling_stats(df, windows=[5, 10]):
     
     for window in windows:
         # 场均得分
-        df[f'pts_last_{window}'] = df.groupby('TEAM_ABBREVIATION')['PTS'].transform(
+        df[f'pts_last_{window}'] = df.groupby('TEAM_ABBREVIATION', observed=True)['PTS'].transform(
             lambda x: x.rolling(window, min_periods=1).mean().shift(1)
         )
         
         # 场均命中率
-        df[f'fg_pct_last_{window}'] = df.groupby('TEAM_ABBREVIATION')['FG_PCT'].transform(
+        df[f'fg_pct_last_{window}'] = df.groupby('TEAM_ABBREVIATION', observed=True)['FG_PCT'].transform(
             lambda x: x.rolling(window, min_periods=1).mean().shift(1)
         )
         
         # 场均篮板
-        df[f'reb_last_{window}'] = df.groupby('TEAM_ABBREVIATION')['REB'].transform(
+        df[f'reb_last_{window}'] = df.groupby('TEAM_ABBREVIATION', observed=True)['REB'].transform(
             lambda x: x.rolling(window, min_periods=1).mean().shift(1)
         )
     
@@ -62,62 +79,59 @@ def build_team_rolling_stats(df, windows=[5, 10]):
 def build_matchup_features(df):
     """构建对阵特征"""
     print(f"\n🔧 构建对阵特征...")
-    
-    # 每场比赛创建一行（合并主客队）
-    games = []
-    
-    for game_id in df['GAME_ID'].unique():
-        game_df = df[df['GAME_ID'] == game_id]
-        
-        if len(game_df) != 2:
-            continue
-        
-        team1 = game_df.iloc[0]
-        team2 = game_df.iloc[1]
-        
-        # 判断主客场
-        is_home_1 = 'vs' in team1['MATCHUP']
-        home_team = team1 if is_home_1 else team2
-        away_team = team2 if is_home_1 else team1
-        
-        feature = {
-            'game_id': game_id,
-            'game_date': team1['GAME_DATE'],
-            
-            # 实际总分（标签）
-            'total_points': team1['PTS'] + team2['PTS'],
-            'home_points': home_team['PTS'],
-            'away_points': away_team['PTS'],
-            
-            # 主队特征
-            'home_team': home_team['TEAM_ABBREVIATION'],
-            'home_pts_last_5': home_team.get('pts_last_5', 0),
-            'home_pts_last_10': home_team.get('pts_last_10', 0),
-            'home_fg_pct_last_5': home_team.get('fg_pct_last_5', 0),
-            
-            # 客队特征
-            'away_team': away_team['TEAM_ABBREVIATION'],
-            'away_pts_last_5': away_team.get('pts_last_5', 0),
-            'away_pts_last_10': away_team.get('pts_last_10', 0),
-            'away_fg_pct_last_5': away_team.get('fg_pct_last_5', 0),
-            
-            # 组合特征
-            'combined_pts_last_5': home_team.get('pts_last_5', 0) + away_team.get('pts_last_5', 0),
-            'combined_pts_last_10': home_team.get('pts_last_10', 0) + away_team.get('pts_last_10', 0),
-        }
-        
-        games.append(feature)
-    
-    features_df = pd.DataFrame(games)
+
+    # 每场比赛创建一行：主客队按GAME_ID merge成宽表
+    # （替代逐场boolean过滤的O(N²)循环，全部变成向量化列运算）
+    df = df.copy()
+    df['is_home'] = df['MATCHUP'].str.contains('vs', regex=False)
+    home = df[df['is_home']]
+    away = df[~df['is_home']]
+    m = home.merge(away, on='GAME_ID', suffixes=('_home', '_away'))
+
+    features_df = pd.DataFrame({
+        'game_id': m['GAME_ID'],
+        'game_date': m['GAME_DATE_home'],
+
+        # 实际总分（标签）
+        'total_points': m['PTS_home'] + m['PTS_away'],
+        'home_points': m['PTS_home'],
+        'away_points': m['PTS_away'],
+
+        # 主队特征
+        'home_team': m['TEAM_ABBREVIATION_home'],
+        'home_pts_last_5': m['pts_last_5_home'],
+        'home_pts_last_10': m['pts_last_10_home'],
+        'home_fg_pct_last_5': m['fg_pct_last_5_home'],
+
+        # 客队特征
+        'away_team': m['TEAM_ABBREVIATION_away'],
+        'away_pts_last_5': m['pts_last_5_away'],
+        'away_pts_last_10': m['pts_last_10_away'],
+        'away_fg_pct_last_5': m['fg_pct_last_5_away'],
+
+        # 组合特征
+        'combined_pts_last_5': m['pts_last_5_home'] + m['pts_last_5_away'],
+        'combined_pts_last_10': m['pts_last_10_home'] + m['pts_last_10_away'],
+    })
     print(f"✅ 构建了 {len(features_df)} 场比赛的特征")
     print(f"   特征维度: {len(features_df.columns)} 列")
     
     return features_df
 
-def save_features(df, filename='features.csv'):
-    """保存特征"""
+def save_features(df, filename='features.parquet'):
+    """保存特征（parquet列式存储，比CSV小且读写快一个量级）"""
+    # 特征都是场均分这个量级，float32精度绰绰有余，落盘宽度减半
+    float_cols = df.select_dtypes('float64').columns
+    df = df.astype({c: 'float32' for c in float_cols})
+
     filepath = FEATURES_DIR / filename
-    df.to_csv(filepath, index=False)
+    try:
+        df.to_parquet(filepath, compression='snappy', index=False)
+    except ImportError:
+        # 没装pyarrow/fastparquet时退回CSV
+        filepath = filepath.with_suffix('.csv')
+        df.to_csv(filepath, index=False, lineterminator='\n',
+                  float_format='%.3f', encoding='utf-8')
     print(f"\n💾 特征已保存: {filepath}")
     print(f"   大小: {filepath.stat().st_size / 1024:.1f} KB")
 
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+特征工程公共实现 - v2/v3/v4共用
+
+v2/v3/v4原来是~90%复制粘贴，各自重复读CSV、排序、算同一套滑动统计。
+这里统一算一份"全量"球队统计（V4超集），各版本只做列选择：
+- compute_team_stats: 滑动窗口统计（numba内核优先，pandas兜底）
+- compute_matchup:    主客队merge宽表 + 按版本开关选列
+- get_team_stats:     按输入hash的parquet缓存，三个版本共用一份
+"""
+import hashlib
+import json
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+from rolling_kernels import team_rolling_stats, team_rolling_mean
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / 'data'
+RAW_DIR = DATA_DIR / 'raw'
+FEATURES_DIR = DATA_DIR / 'features'
+INJURIES_DIR = DATA_DIR / 'injuries'
+FEATURES_DIR.mkdir(parents=True, exist_ok=True)
+
+GAMES_FILE = RAW_DIR / 'games_2024-25_clean.csv'
+
+# 已知schema，显式声明dtype跳过read_csv的两遍类型推断；
+# 小整型/float32也减少下游rolling要搬的字节数
+GAMES_DTYPES = {
+    'TEAM_ABBREVIATION': 'category',
+    'MATCHUP': 'string',
+    'PTS': 'int16',
+    'OPP_PTS': 'int16',
+    'FG_PCT': 'float32',
+    'REB': 'int16',
+}
+
+# rolling的numba加速：装了numba才启用（首次用一个小Series预热JIT）
+try:
+    import numba  # noqa: F401
+    ROLLING_KWARGS = {'engine': 'numba', 'engine_kwargs': {'nopython': True, 'nogil': True, 'parallel': True}}
+    pd.Series(np.zeros(10)).rolling(3, min_periods=1).mean(**ROLLING_KWARGS)
+except ImportError:
+    ROLLING_KWARGS = {}
+
+# 加载球员数据库
+with open(DATA_DIR / 'player_stats.json', 'r') as f:
+    PLAYER_STATS = json.load(f)
+
+# 摊平成 {球员: ppg} 并预构建Series，供向量化.map一次查表
+PLAYER_PPG = {name: stats['ppg'] for name, stats in PLAYER_STATS.items()}
+PLAYER_PPG_SERIES = pd.Series(PLAYER_PPG, dtype='float64')
+
+
+def load_games():
+    """加载真实数据"""
+    # clean_espn_data落的parquet副本优先：零解析且dtype已定
+    parquet_file = GAMES_FILE.with_suffix('.parquet')
+    if parquet_file.exists():
+        df = pd.read_parquet(parquet_file)
+    else:
+        # GAME_DATE保持ISO字符串：排序等价，且特征文件下游按字符串消费
+        df = pd.read_csv(GAMES_FILE, dtype=GAMES_DTYPES)
+    print(f"📊 加载了 {len(df)//2} 场比赛")
+    return df
+
+
+def load_injuries():
+    """加载最新伤病报告"""
+    filepath = INJURIES_DIR / 'injuries_latest.csv'
+
+    if not filepath.exists():
+        print("⚠️  伤病数据不存在，运行: python scripts/fetch_injuries.py")
+        return pd.DataFrame()
+
+    df = pd.read_csv(filepath)
+    # 只保留确定缺阵的球员
+    df = df[df['status'] == 'Out']
+    print(f"🏥 加载了 {len(df)} 条伤病记录（确定缺阵）")
+
+    return df
+
+
+def calc_injury_impacts(injuries_df):
+    """
+    计算每队伤病影响分（一次向量化join算完所有队）
+    公式: sum(缺阵球员PPG) / 5 (简化版)
+    """
+    if injuries_df.empty:
+        return {}
+
+    # 球员PPG向量化查表（C级哈希，一次map），查不到的直接丢掉
+    ppg = injuries_df['player'].map(PLAYER_PPG_SERIES)
+    known = injuries_df.assign(ppg=ppg).dropna(subset=['ppg'])
+    impact_by_team = (known['ppg'] / 5).groupby(known['team']).sum().to_dict()
+
+    for team, grp in known.groupby('team'):
+        players = [f"{p}({v:.1f}PPG)" for p, v in zip(grp['player'].head(2), grp['ppg'].head(2))]
+        print(f"      {team}: {', '.join(players)} → 影响-{impact_by_team[team]:.1f}分")
+
+    return impact_by_team
+
+
+def compute_team_stats(df):
+    """构建球队滑动窗口统计（全量：V2基础 + V4防守节奏）"""
+    print(f"\n🔧 计算球队滑动统计...")
+
+    df = df.sort_values(['TEAM_ABBREVIATION', 'GAME_DATE']).copy()
+
+    # 节奏用的总分列
+    df['total_pts'] = df['PTS'] + df['OPP_PTS']
+
+    # 先试numba内核：按球队分段一遍流式算完所有窗口的mean/std(+shift)
+    kernel_cols = team_rolling_stats(df, [3, 5, 10])
+    if kernel_cols is not None:
+        for col, arr in kernel_cols.items():
+            df[col] = arr
+        # 防守效率 = 近10场对手均分（同一内核已算好）
+        df['def_rating_last_10'] = kernel_cols['opp_pts_last_10']
+        df['pace_last_10'] = team_rolling_mean(df, 'total_pts', 10)
+    else:
+        # pandas路径：一次groupby + GroupBy.rolling，避免每列每窗口一个Python lambda
+        g = df.groupby('TEAM_ABBREVIATION', sort=False, observed=True)
+        stat_cols = []
+
+        for window in [3, 5, 10]:
+            rolled = g[['PTS', 'OPP_PTS']].rolling(window, min_periods=1).mean(**ROLLING_KWARGS).reset_index(level=0, drop=True)
+            df[f'pts_last_{window}'] = rolled['PTS']
+            df[f'opp_pts_last_{window}'] = rolled['OPP_PTS']
+            df[f'pts_std_{window}'] = g['PTS'].rolling(window, min_periods=2).std(**ROLLING_KWARGS).reset_index(level=0, drop=True)
+            stat_cols += [f'pts_last_{window}', f'opp_pts_last_{window}', f'pts_std_{window}']
+
+        df['def_rating_last_10'] = g['OPP_PTS'].rolling(10, min_periods=1).mean(**ROLLING_KWARGS).reset_index(level=0, drop=True)
+        df['pace_last_10'] = g['total_pts'].rolling(10, min_periods=1).mean(**ROLLING_KWARGS).reset_index(level=0, drop=True)
+        stat_cols += ['def_rating_last_10', 'pace_last_10']
+
+        # 组内统一shift(1)：只用比赛前已知的数据
+        df[stat_cols] = df.groupby('TEAM_ABBREVIATION', sort=False, observed=True)[stat_cols].shift(1)
+
+    # 主客场分组统计
+    df['is_home'] = df['MATCHUP'].str.contains('vs', regex=False)
+    df['pts_last_5_home'] = df[df['is_home']].groupby('TEAM_ABBREVIATION', observed=True)['PTS'].transform(
+        lambda x: x.rolling(5, min_periods=1).mean().shift(1)
+    )
+    df['pts_last_5_away'] = df[~df['is_home']].groupby('TEAM_ABBREVIATION', observed=True)['PTS'].transform(
+        lambda x: x.rolling(5, min_periods=1).mean().shift(1)
+    )
+
+    # 填充主客场数据（用全局均分）——np.where一次向量化pass，
+    # 避免链式fillna(inplace=True)在新版pandas里的CoW拷贝和弃用警告
+    pts_last_5 = df['pts_last_5'].to_numpy()
+    for col in ('pts_last_5_home', 'pts_last_5_away'):
+        values = df[col].to_numpy()
+        df[col] = np.where(np.isnan(values), pts_last_5, values)
+
+    print(f"✅ 添加了 {len([c for c in df.columns if 'last' in c or 'std' in c])} 个统计特征")
+
+    return df
+
+
+def get_team_stats(df):
+    """带磁盘缓存的compute_team_stats：输入文件没变就直接读parquet（三个版本共用）
+
+    key用(size, mtime_ns)而不是内容hash：每日fetch是往文件尾部追加，
+    只hash头部会命中旧缓存、漏掉新比赛的滚动统计
+    """
+    st = GAMES_FILE.stat()
+    key = hashlib.md5(f"{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()[:12]
+    cache = FEATURES_DIR / f'team_stats_{key}.parquet'
+
+    if cache.exists():
+        print(f"⚡ 命中球队统计缓存: {cache.name}")
+        return pd.read_parquet(cache)
+
+    stats_df = compute_team_stats(df)
+    try:
+        stats_df.to_parquet(cache)
+    except ImportError:
+        pass  # 没装pyarrow/fastparquet就不写缓存
+    return stats_df
+
+
+def compute_matchup(df, injuries_df=None, add_injury=False, add_pace_def=False):
+    """
+    构建对阵特征宽表
+
+    Args:
+        df: compute_team_stats的输出
+        injuries_df: 伤病表（add_injury=True时使用）
+        add_injury: 加V3伤病特征
+        add_pace_def: 加V4防守+节奏特征
+    """
+    print(f"\n🔧 构建对阵特征...")
+
+    # 🏥 每队伤病影响只算一次，再map到每场比赛
+    impact_by_team = {}
+    if add_injury:
+        if injuries_df is not None and not injuries_df.empty:
+            print(f"   伤病影响计算:")
+            impact_by_team = calc_injury_impacts(injuries_df)
+
+    # 主客队按GAME_ID merge成宽表，替代逐场boolean过滤的O(N²)循环
+    home = df[df['is_home']]
+    away = df[~df['is_home']]
+    m = home.merge(away, on='GAME_ID', suffixes=('_home', '_away'))
+
+    cols = {
+        # V2基础特征
+        'game_id': m['GAME_ID'],
+        'game_date': m['GAME_DATE_home'],
+        'total_points': m['PTS_home'] + m['PTS_away'],
+        'home_points': m['PTS_home'],
+        'away_points': m['PTS_away'],
+        'home_team': m['TEAM_ABBREVIATION_home'],
+        'home_pts_last_3': m['pts_last_3_home'],
+        'home_pts_last_5': m['pts_last_5_home'],
+        'home_pts_last_10': m['pts_last_10_home'],
+        'home_opp_pts_last_5': m['opp_pts_last_5_home'],
+        'home_pts_std_5': m['pts_std_5_home'],
+        'home_pts_last_5_home': m['pts_last_5_home_home'],  # 主场优势
+        'away_team': m['TEAM_ABBREVIATION_away'],
+        'away_pts_last_3': m['pts_last_3_away'],
+        'away_pts_last_5': m['pts_last_5_away'],
+        'away_pts_last_10': m['pts_last_10_away'],
+        'away_opp_pts_last_5': m['opp_pts_last_5_away'],
+        'away_pts_std_5': m['pts_std_5_away'],
+        'away_pts_last_5_away': m['pts_last_5_away_away'],  # 客场表现
+        'combined_pts_last_3': m['pts_last_3_home'] + m['pts_last_3_away'],
+        'combined_pts_last_5': m['pts_last_5_home'] + m['pts_last_5_away'],
+        'combined_pts_last_10': m['pts_last_10_home'] + m['pts_last_10_away'],
+        'home_off_vs_away_def': m['pts_last_5_home'] - m['opp_pts_last_5_away'],
+        'away_off_vs_home_def': m['pts_last_5_away'] - m['opp_pts_last_5_home'],
+        'home_field_advantage': m['pts_last_5_home_home'] - m['pts_last_5_away_away'],
+    }
+
+    # 🏥 V3伤病特征
+    if add_injury:
+        cols['home_injury_impact'] = m['TEAM_ABBREVIATION_home'].map(impact_by_team).fillna(0.0)
+        cols['away_injury_impact'] = m['TEAM_ABBREVIATION_away'].map(impact_by_team).fillna(0.0)
+
+    # 🆕 V4防守 + 节奏特征
+    if add_pace_def:
+        cols['home_def_rating_last_10'] = m['def_rating_last_10_home']
+        cols['away_def_rating_last_10'] = m['def_rating_last_10_away']
+        cols['home_pace_last_10'] = m['pace_last_10_home']
+        cols['away_pace_last_10'] = m['pace_last_10_away']
+
+    features_df = pd.DataFrame(cols)
+    print(f"✅ 构建了 {len(features_df)} 场比赛的特征")
+    print(f"   特征维度: {len(features_df.columns)} 列")
+
+    return features_df
+
+
+def save_features(df, filename):
+    """保存特征（parquet列式存储，比CSV小且读写快一个量级）"""
+    # 特征都是场均分这个量级，float32精度绰绰有余，落盘宽度减半
+    float_cols = df.select_dtypes('float64').columns
+    df = df.astype({c: 'float32' for c in float_cols})
+
+    filepath = FEATURES_DIR / filename
+    try:
+        df.to_parquet(filepath, compression='snappy', index=False)
+    except ImportError:
+        # 没装pyarrow/fastparquet时退回CSV
+        filepath = filepath.with_suffix('.csv')
+        df.to_csv(filepath, index=False, lineterminator='\n',
+                  float_format='%.3f', encoding='utf-8')
+    print(f"\n💾 特征已保存: {filepath}")
+    print(f"   大小: {filepath.stat().st_size / 1024:.1f} KB")
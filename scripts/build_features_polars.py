@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+特征工程 - polars实验版（可选，需要 pip install polars>=1.0）
+
+整条管线就是 sort → 组内rolling → 组内shift → 主客join，全是polars的
+强项：懒执行查询优化 + 多线程Arrow内核，rolling天然按球队并行。
+输出与 build_features_v4.py 相同的24维特征表（features_v4.parquet），
+可直接替换pandas管线使用；没装polars时提示后退出。
+"""
+import json
+import sys
+from pathlib import Path
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / 'data'
+RAW_DIR = DATA_DIR / 'raw'
+FEATURES_DIR = DATA_DIR / 'features'
+INJURIES_DIR = DATA_DIR / 'injuries'
+FEATURES_DIR.mkdir(parents=True, exist_ok=True)
+
+GAMES_FILE = RAW_DIR / 'games_2024-25_clean.csv'
+
+with open(DATA_DIR / 'player_stats.json', 'r') as f:
+    PLAYER_STATS = json.load(f)
+PLAYER_PPG = {name: stats['ppg'] for name, stats in PLAYER_STATS.items()}
+
+
+def build_lazy_team_stats():
+    """懒执行构建球队滑动统计（表达式链在.over里按球队分组求值）"""
+    lf = (
+        pl.scan_csv(GAMES_FILE)
+        .sort(['TEAM_ABBREVIATION', 'GAME_DATE'])
+        .with_columns([
+            pl.col('MATCHUP').str.contains('vs', literal=True).alias('is_home'),
+            (pl.col('PTS') + pl.col('OPP_PTS')).alias('total_pts'),
+        ])
+    )
+
+    stat_exprs = []
+    for w in (3, 5, 10):
+        stat_exprs += [
+            pl.col('PTS').rolling_mean(w, min_samples=1).shift(1)
+              .over('TEAM_ABBREVIATION').alias(f'pts_last_{w}'),
+            pl.col('OPP_PTS').rolling_mean(w, min_samples=1).shift(1)
+              .over('TEAM_ABBREVIATION').alias(f'opp_pts_last_{w}'),
+            pl.col('PTS').rolling_std(w, min_samples=2).shift(1)
+              .over('TEAM_ABBREVIATION').alias(f'pts_std_{w}'),
+        ]
+    # V4防守效率 + 节奏
+    stat_exprs += [
+        pl.col('OPP_PTS').rolling_mean(10, min_samples=1).shift(1)
+          .over('TEAM_ABBREVIATION').alias('def_rating_last_10'),
+        pl.col('total_pts').rolling_mean(10, min_samples=1).shift(1)
+          .over('TEAM_ABBREVIATION').alias('pace_last_10'),
+    ]
+    lf = lf.with_columns(stat_exprs)
+
+    # 主/客场近5场均分：各自子集内rolling，再join回主表
+    venue_parts = []
+    for venue, keep_home in (('home', True), ('away', False)):
+        cond = pl.col('is_home') if keep_home else ~pl.col('is_home')
+        venue_parts.append(
+            lf.filter(cond)
+              .with_columns(
+                  pl.col('PTS').rolling_mean(5, min_samples=1).shift(1)
+                    .over('TEAM_ABBREVIATION').alias(f'pts_last_5_{venue}')
+              )
+              .select(['GAME_ID', 'TEAM_ABBREVIATION', f'pts_last_5_{venue}'])
+        )
+    for part in venue_parts:
+        lf = lf.join(part, on=['GAME_ID', 'TEAM_ABBREVIATION'], how='left')
+
+    # 缺失的主客场均分用全局近5场均分兜底
+    return lf.with_columns([
+        pl.col('pts_last_5_home').fill_null(pl.col('pts_last_5')),
+        pl.col('pts_last_5_away').fill_null(pl.col('pts_last_5')),
+    ])
+
+
+def injury_impacts():
+    """每队伤病影响分表（没有伤病数据时返回None）"""
+    filepath = INJURIES_DIR / 'injuries_latest.csv'
+    if not filepath.exists():
+        print("⚠️  伤病数据不存在，伤病特征置0")
+        return None
+
+    return (
+        pl.read_csv(filepath)
+        .filter(pl.col('status') == 'Out')
+        .with_columns(pl.col('player').replace_strict(PLAYER_PPG, default=None).alias('ppg'))
+        .drop_nulls('ppg')
+        .group_by('team')
+        .agg((pl.col('ppg') / 5).sum().alias('injury_impact'))
+    )
+
+
+def main():
+    if pl is None:
+        print("❌ 未安装polars，请: pip install 'polars>=1.0'")
+        print("   或继续使用pandas管线: python scripts/build_features_v4.py")
+        sys.exit(1)
+
+    print("\n" + "="*70)
+    print("🔧 NBA特征工程 (polars实验版, 输出同V4)")
+    print("="*70 + "\n")
+
+    lf = build_lazy_team_stats()
+
+    # 主客队join成宽表
+    home = lf.filter(pl.col('is_home'))
+    away = lf.filter(~pl.col('is_home'))
+    m = home.join(away, on='GAME_ID', suffix='_away')
+
+    features = m.select([
+        pl.col('GAME_ID').alias('game_id'),
+        pl.col('GAME_DATE').alias('game_date'),
+        (pl.col('PTS') + pl.col('PTS_away')).alias('total_points'),
+        pl.col('PTS').alias('home_points'),
+        pl.col('PTS_away').alias('away_points'),
+        pl.col('TEAM_ABBREVIATION').alias('home_team'),
+        pl.col('pts_last_3').alias('home_pts_last_3'),
+        pl.col('pts_last_5').alias('home_pts_last_5'),
+        pl.col('pts_last_10').alias('home_pts_last_10'),
+        pl.col('opp_pts_last_5').alias('home_opp_pts_last_5'),
+        pl.col('pts_std_5').alias('home_pts_std_5'),
+        pl.col('pts_last_5_home').alias('home_pts_last_5_home'),
+        pl.col('TEAM_ABBREVIATION_away').alias('away_team'),
+        pl.col('pts_last_3_away').alias('away_pts_last_3'),
+        pl.col('pts_last_5_away').alias('away_pts_last_5'),
+        pl.col('pts_last_10_away').alias('away_pts_last_10'),
+        pl.col('opp_pts_last_5_away').alias('away_opp_pts_last_5'),
+        pl.col('pts_std_5_away').alias('away_pts_std_5'),
+        pl.col('pts_last_5_away_away').alias('away_pts_last_5_away'),
+        (pl.col('pts_last_3') + pl.col('pts_last_3_away')).alias('combined_pts_last_3'),
+        (pl.col('pts_last_5') + pl.col('pts_last_5_away')).alias('combined_pts_last_5'),
+        (pl.col('pts_last_10') + pl.col('pts_last_10_away')).alias('combined_pts_last_10'),
+        (pl.col('pts_last_5') - pl.col('opp_pts_last_5_away')).alias('home_off_vs_away_def'),
+        (pl.col('pts_last_5_away') - pl.col('opp_pts_last_5')).alias('away_off_vs_home_def'),
+        (pl.col('pts_last_5_home') - pl.col('pts_last_5_away_away')).alias('home_field_advantage'),
+        pl.col('def_rating_last_10').alias('home_def_rating_last_10'),
+        pl.col('def_rating_last_10_away').alias('away_def_rating_last_10'),
+        pl.col('pace_last_10').alias('home_pace_last_10'),
+        pl.col('pace_last_10_away').alias('away_pace_last_10'),
+    ]).collect()
+
+    # 伤病特征join
+    impacts = injury_impacts()
+    if impacts is not None:
+        features = (
+            features
+            .join(impacts.rename({'team': 'home_team', 'injury_impact': 'home_injury_impact'}),
+                  on='home_team', how='left')
+            .join(impacts.rename({'team': 'away_team', 'injury_impact': 'away_injury_impact'}),
+                  on='away_team', how='left')
+            .with_columns([
+                pl.col('home_injury_impact').fill_null(0.0),
+                pl.col('away_injury_impact').fill_null(0.0),
+            ])
+        )
+    else:
+        features = features.with_columns([
+            pl.lit(0.0).alias('home_injury_impact'),
+            pl.lit(0.0).alias('away_injury_impact'),
+        ])
+
+    filepath = FEATURES_DIR / 'features_v4.parquet'
+    features.write_parquet(filepath, compression='snappy')
+
+    print(f"✅ 构建了 {len(features)} 场比赛的特征")
+    print(f"💾 特征已保存: {filepath}")
+    print(f"   大小: {filepath.stat().st_size / 1024:.1f} KB")
+
+    print("\n" + "="*70)
+    print("✅ 特征工程完成 (polars)")
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    main()
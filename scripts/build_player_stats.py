@@ -5,6 +5,7 @@
 """
 import pandas as pd
 import json
+from itertools import islice
 from pathlib import Path
 from collections import defaultdict
 
@@ -16,21 +17,17 @@ def extract_player_stats_from_games():
     从历史比赛数据中估算球员统计
     注: 这是简化版，实际应该用球员级别的API
     """
-    # 加载比赛数据
-    games_df = pd.read_csv(DATA_DIR / 'raw' / 'games_2024-25_clean.csv')
+    # 加载比赛数据（parquet副本优先，零解析）
+    csv_path = DATA_DIR / 'raw' / 'games_2024-25_clean.csv'
+    parquet_path = csv_path.with_suffix('.parquet')
+    if parquet_path.exists():
+        games_df = pd.read_parquet(parquet_path)
+    else:
+        games_df = pd.read_csv(csv_path)
     
-    # 按球队计算场均数据
-    team_stats = {}
-    
-    for team in games_df['TEAM_ABBREVIATION'].unique():
-        team_games = games_df[games_df['TEAM_ABBREVIATION'] == team]
-        
-        team_stats[team] = {
-            'ppg': team_games['PTS'].mean(),
-            'games_played': len(team_games)
-        }
-    
-    return team_stats
+    # 按球队计算场均数据：一次groupby.agg扫完全表，不逐队切片
+    agg = games_df.groupby('TEAM_ABBREVIATION', sort=False)['PTS'].agg(['mean', 'size'])
+    return agg.rename(columns={'mean': 'ppg', 'size': 'games_played'}).to_dict(orient='index')
 
 def create_default_player_db():
     """
@@ -100,7 +97,8 @@ def save_player_db(player_db):
     
     # 显示样本
     print(f"\n📋 球员样本:")
-    for i, (player, stats) in enumerate(list(flat_db.items())[:10], 1):
+    # islice只取前10个，不用把整个dict视图物化成list
+    for i, (player, stats) in enumerate(islice(flat_db.items(), 10), 1):
         print(f"   {i:2d}. {player:25s} - {stats['team']:5s} - {stats['ppg']:.1f} PPG")
 
 def main():
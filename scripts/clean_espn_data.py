@@ -8,13 +8,33 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / 'data' / 'raw'
 
+# 已知schema，显式dtype跳过read_csv的类型推断；category让isin过滤
+# 走整型code比较而不是逐行字符串比较
+ESPN_DTYPES = {
+    'TEAM_ABBREVIATION': 'category',
+    'MATCHUP': 'string',
+    'PTS': 'int16',
+    'OPP_PTS': 'int16',
+    'FG_PCT': 'float32',
+    'REB': 'int16',
+}
+
 def clean_data():
-    # 加载数据
+    # 加载数据（清洗后的文件要保留全部列给下游，不能usecols裁列）
     filepath = DATA_DIR / 'games_2024-25_espn.csv'
-    df = pd.read_csv(filepath)
-    
+    parquet_path = filepath.with_suffix('.parquet')
+    if parquet_path.exists():
+        # fetch_espn_data落的parquet副本：零解析且dtype已定
+        df = pd.read_parquet(parquet_path)
+    else:
+        try:
+            # pyarrow引擎多线程解析，没装pyarrow退回默认C引擎
+            df = pd.read_csv(filepath, dtype=ESPN_DTYPES, engine='pyarrow')
+        except ImportError:
+            df = pd.read_csv(filepath, dtype=ESPN_DTYPES)
+
     print(f"📊 原始数据: {len(df)} 行 ({len(df)//2} 场)")
-    
+
     # 移除全明星赛等特殊赛事
     all_star_teams = ['STARS', 'WORLD', 'STRIPES', 'LEGENDS', 'TEAM']
     df_clean = df[~df['TEAM_ABBREVIATION'].isin(all_star_teams)]
@@ -28,9 +48,14 @@ def clean_data():
     print(f"   场均得分: {df_clean['PTS'].mean():.1f}")
     print(f"   得分范围: {df_clean['PTS'].min()} - {df_clean['PTS'].max()}")
     
-    # 保存
+    # 保存（CSV留给人看，parquet给特征工程零解析重读）
     output_path = DATA_DIR / 'games_2024-25_clean.csv'
-    df_clean.to_csv(output_path, index=False)
+    df_clean.to_csv(output_path, index=False, lineterminator='\n',
+                    float_format='%.3f', encoding='utf-8')
+    try:
+        df_clean.to_parquet(output_path.with_suffix('.parquet'), compression='snappy', index=False)
+    except ImportError:
+        pass  # 没装pyarrow/fastparquet就只留CSV
     print(f"\n💾 已保存: {output_path}")
     
     return df_clean
@@ -13,10 +13,24 @@ import os
 import sys
 from datetime import datetime
 
+# orjson序列化/反序列化比stdlib快2-5x且直接产出bytes，没装就用json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 API_BASE = "https://api.the-odds-api.com/v4"
 SPORT = "basketball_nba"
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "odds")
 
+# 连接池 + 自动退避重试：限流/5xx不再直接浪费那1个credit的机会
+SESSION = requests.Session()
+SESSION.mount("https://", requests.adapters.HTTPAdapter(
+    pool_connections=16, pool_maxsize=16,
+    max_retries=requests.adapters.Retry(
+        total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+))
+
 def fetch_odds(api_key, regions="au,us", markets="totals"):
     """获取当前NBA totals盘口"""
     url = f"{API_BASE}/sports/{SPORT}/odds/"
@@ -26,7 +40,7 @@ def fetch_odds(api_key, regions="au,us", markets="totals"):
         "markets": markets,
         "oddsFormat": "decimal",
     }
-    resp = requests.get(url, params=params)
+    resp = SESSION.get(url, params=params)
     resp.raise_for_status()
     
     remaining = resp.headers.get("x-requests-remaining", "?")
@@ -38,18 +52,21 @@ def fetch_odds(api_key, regions="au,us", markets="totals"):
 def parse_totals(data):
     """提取totals盘口数据"""
     records = []
+    # (game_id, bookmaker) -> record索引，Under直接O(1)找到对应Over行，
+    # 不再每次线性扫整个records
+    index = {}
     for game in data:
         game_id = game["id"]
         home = game["home_team"]
         away = game["away_team"]
         commence = game["commence_time"]
-        
+
         for bm in game.get("bookmakers", []):
             for market in bm.get("markets", []):
                 if market["key"] == "totals":
                     for outcome in market["outcomes"]:
                         if outcome["name"] == "Over":
-                            records.append({
+                            record = {
                                 "game_id": game_id,
                                 "date": commence[:10],
                                 "commence_time": commence,
@@ -59,38 +76,71 @@ def parse_totals(data):
                                 "line": outcome.get("point"),
                                 "over_price": outcome.get("price"),
                                 "collected_at": datetime.utcnow().isoformat(),
-                            })
+                            }
+                            records.append(record)
+                            index[(game_id, bm["key"])] = record
                         elif outcome["name"] == "Under":
-                            # 找到对应的over记录并添加under价格
-                            for r in records:
-                                if r["game_id"] == game_id and r["bookmaker"] == bm["key"]:
-                                    r["under_price"] = outcome.get("price")
+                            record = index.get((game_id, bm["key"]))
+                            if record is not None:
+                                record["under_price"] = outcome.get("price")
     return records
 
+def _append_records(filepath, idx_path, records):
+    """批量追加记录到NDJSON数据文件和.idx旁车"""
+    if orjson:
+        payload = b"".join(orjson.dumps(r) + b"\n" for r in records)
+    else:
+        payload = "".join(json.dumps(r) + "\n" for r in records).encode()
+    with open(filepath, "ab") as f:
+        f.write(payload)
+    with open(idx_path, "a") as f:
+        f.writelines(f"{r['game_id']}\t{r['bookmaker']}\n" for r in records)
+
 def save_odds(records):
-    """保存到日期文件"""
+    """
+    保存到日期文件（NDJSON追加 + .idx旁车去重）
+    每次只追加新记录，写入成本O(新记录)；旧版整文件JSON是每跑一次
+    全量读-改-写，一天跑多次就是平方级开销
+    """
     os.makedirs(DATA_DIR, exist_ok=True)
     today = datetime.utcnow().strftime("%Y-%m-%d")
-    filepath = os.path.join(DATA_DIR, f"odds_{today}.json")
-    
-    # 追加模式：如果文件已存在，合并
-    existing = []
-    if os.path.exists(filepath):
-        with open(filepath) as f:
-            existing = json.load(f)
-    
-    # 去重（同一game_id+bookmaker只保留最新）
-    seen = {(r["game_id"], r["bookmaker"]) for r in existing}
+    filepath = os.path.join(DATA_DIR, f"odds_{today}.ndjson")
+    idx_path = os.path.join(DATA_DIR, f"odds_{today}.idx")
+    legacy_path = os.path.join(DATA_DIR, f"odds_{today}.json")
+
+    # 去重集从idx旁车构建（每行 game_id\tbookmaker），不用解析数据文件
+    seen = set()
+    if os.path.exists(idx_path):
+        with open(idx_path) as f:
+            seen = {tuple(line.rstrip("\n").split("\t")) for line in f if line.strip()}
+    elif os.path.exists(legacy_path):
+        # 当天已有旧版整文件JSON：把旧记录整体搬进NDJSON并补写idx
+        # （一次性迁移）。新文件自包含，扫描端只读.ndjson也不会丢
+        # 当天早先收集的盘口
+        with open(legacy_path, "rb") as f:
+            raw = f.read()
+        legacy = orjson.loads(raw) if orjson else json.loads(raw)
+        migrated = []
+        for r in legacy:
+            key = (r["game_id"], r["bookmaker"])
+            if key not in seen:
+                migrated.append(r)
+                seen.add(key)
+        if migrated:
+            _append_records(filepath, idx_path, migrated)
+
+    # 同一game_id+bookmaker只保留最早一条（与旧行为一致）
+    new_records = []
     for r in records:
         key = (r["game_id"], r["bookmaker"])
         if key not in seen:
-            existing.append(r)
+            new_records.append(r)
             seen.add(key)
-    
-    with open(filepath, "w") as f:
-        json.dump(existing, f, indent=2)
-    
-    print(f"💾 保存 {len(records)} 条盘口到 {filepath}（总计{len(existing)}条）")
+
+    if new_records:
+        _append_records(filepath, idx_path, new_records)
+
+    print(f"💾 追加 {len(new_records)} 条盘口到 {filepath}（总计{len(seen)}条）")
     return filepath
 
 def main():
@@ -11,82 +11,73 @@ PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / 'data' / 'raw'
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-# 生成模拟比赛数据
-np.random.seed(42)
+# 生成模拟比赛数据（批量RNG：所有随机字段一次抽完，免去逐场的标量调用）
+rng = np.random.default_rng(42)
 
 teams = [
-    'LAL', 'GSW', 'BOS', 'MIA', 'PHX', 'DAL', 'DEN', 'MIL', 
+    'LAL', 'GSW', 'BOS', 'MIA', 'PHX', 'DAL', 'DEN', 'MIL',
     'PHI', 'BKN', 'CHI', 'ATL', 'CLE', 'MEM', 'SAC', 'NYK'
 ]
 
 num_games = 100
-games = []
+teams_arr = np.array(teams)
 
-for i in range(num_games):
-    # 随机选两支球队
-    team_a, team_b = np.random.choice(teams, 2, replace=False)
-    
-    # 模拟得分（平均110分，标准差12）
-    pts_a = int(np.random.normal(110, 12))
-    pts_b = int(np.random.normal(110, 12))
-    
-    # 总分
-    total = pts_a + pts_b
-    
-    # 主客场
-    home_team = team_a
-    away_team = team_b
-    
-    # 日期
-    game_date = (datetime.now() - timedelta(days=num_games-i)).strftime('%Y-%m-%d')
-    
-    # 添加主队数据
-    games.append({
-        'GAME_ID': f'002{2400000 + i:05d}',
-        'GAME_DATE': game_date,
-        'TEAM_ABBREVIATION': home_team,
-        'TEAM_NAME': f'{home_team} Team',
-        'MATCHUP': f'{home_team} vs. {away_team}',
-        'WL': 'W' if pts_a > pts_b else 'L',
-        'PTS': pts_a,
-        'FGM': int(pts_a * 0.38),
-        'FGA': int(pts_a * 0.85),
-        'FG_PCT': round(0.45 + np.random.uniform(-0.05, 0.05), 3),
-        'FG3M': int(pts_a * 0.12),
-        'FG3A': int(pts_a * 0.30),
-        'FG3_PCT': round(0.36 + np.random.uniform(-0.05, 0.05), 3),
-        'REB': int(np.random.normal(45, 5)),
-        'AST': int(np.random.normal(25, 5)),
-       'TOV': int(np.random.normal(12, 3)),
-        'PLUS_MINUS': pts_a - pts_b,
-    })
-    
-    # 添加客队数据  
-    games.append({
-        'GAME_ID': f'002{2400000 + i:05d}',
-        'GAME_DATE': game_date,
-        'TEAM_ABBREVIATION': away_team,
-        'TEAM_NAME': f'{away_team} Team',
-        'MATCHUP': f'{away_team} @ {home_team}',
-        'WL': 'W' if pts_b > pts_a else 'L',
-        'PTS': pts_b,
-        'FGM': int(pts_b * 0.38),
-        'FGA': int(pts_b * 0.85),
-        'FG_PCT': round(0.45 + np.random.uniform(-0.05, 0.05), 3),
-        'FG3M': int(pts_b * 0.12),
-        'FG3A': int(pts_b * 0.30),
-        'FG3_PCT': round(0.36 + np.random.uniform(-0.05, 0.05), 3),
-        'REB': int(np.random.normal(45, 5)),
-        'AST': int(np.random.normal(25, 5)),
-        'TOV': int(np.random.normal(12, 3)),
-        'PLUS_MINUS': pts_b - pts_a,
+# 随机对阵：一次抽完所有(主,客)，撞到同队的重抽（拒绝采样）
+pairs = rng.integers(0, len(teams), size=(num_games, 2))
+dup = pairs[:, 0] == pairs[:, 1]
+while dup.any():
+    pairs[dup, 1] = rng.integers(0, len(teams), size=int(dup.sum()))
+    dup = pairs[:, 0] == pairs[:, 1]
+home_teams = teams_arr[pairs[:, 0]]
+away_teams = teams_arr[pairs[:, 1]]
+
+# 模拟得分（平均110分，标准差12）
+pts_home = rng.normal(110, 12, num_games).astype(int)
+pts_away = rng.normal(110, 12, num_games).astype(int)
+
+game_ids = np.array([f'002{2400000 + i:05d}' for i in range(num_games)])
+today = datetime.now()
+game_dates = np.array([(today - timedelta(days=num_games - i)).strftime('%Y-%m-%d')
+                       for i in range(num_games)])
+
+def make_side(team, opp, pts, opp_pts, sep):
+    """一侧球队的所有行（纯数组运算）"""
+    n = len(pts)
+    return pd.DataFrame({
+        'GAME_ID': game_ids,
+        'GAME_DATE': game_dates,
+        'TEAM_ABBREVIATION': team,
+        'TEAM_NAME': np.char.add(team, ' Team'),
+        'MATCHUP': np.char.add(np.char.add(team, sep), opp),
+        'WL': np.where(pts > opp_pts, 'W', 'L'),
+        'PTS': pts,
+        'FGM': (pts * 0.38).astype(int),
+        'FGA': (pts * 0.85).astype(int),
+        'FG_PCT': np.round(0.45 + rng.uniform(-0.05, 0.05, n), 3),
+        'FG3M': (pts * 0.12).astype(int),
+        'FG3A': (pts * 0.30).astype(int),
+        'FG3_PCT': np.round(0.36 + rng.uniform(-0.05, 0.05, n), 3),
+        'REB': rng.normal(45, 5, n).astype(int),
+        'AST': rng.normal(25, 5, n).astype(int),
+        'TOV': rng.normal(12, 3, n).astype(int),
+        'PLUS_MINUS': pts - opp_pts,
     })
 
-df = pd.DataFrame(games)
+df = pd.concat([
+    make_side(home_teams, away_teams, pts_home, pts_away, ' vs. '),
+    make_side(away_teams, home_teams, pts_away, pts_home, ' @ '),
+], ignore_index=True)
+# 每场的主队行在前、客队行在后（稳定排序保持concat顺序）
+df = df.sort_values('GAME_ID', kind='stable', ignore_index=True)
 
-# 保存
+# 保存（CSV留给人看，parquet给下游零解析重读）
 filepath = DATA_DIR / 'games_2024-25.csv'
-df.to_csv(filepath, index=False)
+df.to_csv(filepath, index=False, lineterminator='\n',
+          float_format='%.3f', encoding='utf-8')
+try:
+    df.to_parquet(filepath.with_suffix('.parquet'), compression='snappy', index=False)
+except ImportError:
+    pass  # 没装pyarrow/fastparquet就只留CSV
 print(f"✅ 已生成模拟数据: {filepath}")
 print(f"   行数: {len(df)}, 列数: {len(df.columns)}")
 print(f"   总分范围: {df.groupby('GAME_ID')['PTS'].sum().min():.0f} - {df.groupby('GAME_ID')['PTS'].sum().max():.0f}")
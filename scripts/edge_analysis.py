@@ -9,12 +9,43 @@ V3模型Edge分析：在不同盘口线下的真实准确率
 import pandas as pd
 import numpy as np
 import joblib
+import hashlib
 import os
 import json
 from sklearn.model_selection import TimeSeriesSplit
 
 PROJECT = os.path.dirname(os.path.dirname(__file__))
 
+# 分桶统计的numba内核：单遍扫描零临时数组；没装numba退回bincount路径
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _bin_counts(abs_dev, correct, over_pred, edges):
+        nb = len(edges) - 1
+        out_n = np.zeros(nb, np.int64)
+        out_correct = np.zeros(nb, np.int64)
+        out_over = np.zeros(nb, np.int64)
+        for i in range(len(abs_dev)):
+            b = np.searchsorted(edges, abs_dev[i], side='right') - 1
+            if 0 <= b < nb:
+                out_n[b] += 1
+                out_correct[b] += correct[i]
+                out_over[b] += over_pred[i]
+        return out_n, out_correct, out_over
+else:
+    def _bin_counts(abs_dev, correct, over_pred, edges):
+        nb = len(edges) - 1
+        b = np.searchsorted(edges, abs_dev, side='right') - 1
+        valid = (b >= 0) & (b < nb)
+        b = b[valid]
+        return (np.bincount(b, minlength=nb),
+                np.bincount(b, weights=correct[valid], minlength=nb).astype(np.int64),
+                np.bincount(b, weights=over_pred[valid], minlength=nb).astype(np.int64))
+
 def load_model_and_data():
     """加载V3模型和特征数据"""
     pkg = joblib.load(os.path.join(PROJECT, "models/total_points_model_v3.pkl"))
@@ -24,11 +55,24 @@ def load_model_and_data():
         print(f"   模型特征: {len(feature_cols_saved)} 个")
     
     # 尝试加载combined features
-    feat_path = os.path.join(PROJECT, "data/features/features_v3_combined.csv")
-    if not os.path.exists(feat_path):
-        feat_path = os.path.join(PROJECT, "data/features/features_v3.csv")
-    
-    df = pd.read_csv(feat_path)
+    candidates = [
+        os.path.join(PROJECT, "data/features/features_v3_combined.parquet"),
+        os.path.join(PROJECT, "data/features/features_v3_combined.csv"),
+        os.path.join(PROJECT, "data/features/features_v3.parquet"),
+        os.path.join(PROJECT, "data/features/features_v3.csv"),
+    ]
+    feat_path = next((p for p in candidates if os.path.exists(p)), candidates[-1])
+
+    if feat_path.endswith('.parquet'):
+        df = pd.read_parquet(feat_path)
+    else:
+        try:
+            # pyarrow引擎：多线程tokenizer，列直接落成连续数组
+            df = pd.read_csv(feat_path, engine='pyarrow')
+            # 顺手落一份parquet，下次走candidates里的parquet分支零解析
+            df.to_parquet(feat_path[:-4] + '.parquet', compression='snappy', index=False)
+        except ImportError:
+            df = pd.read_csv(feat_path)
     print(f"📊 数据: {len(df)} 场, 特征文件: {os.path.basename(feat_path)}")
     return model, df, feature_cols_saved
 
@@ -40,18 +84,38 @@ def run_edge_analysis(model, df, feature_cols_saved):
         feature_cols = [c for c in feature_cols_saved if c in df.columns]
     else:
         feature_cols = [c for c in df.columns if c not in ['date', 'total_points', 'home_team', 'away_team', 'season']]
-    # 确保只用数值列
-    feature_cols = [c for c in feature_cols if df[c].dtype in ['int64','float64','int32','float32']]
-    X = df[feature_cols].values
-    y = df['total_points'].values
+    # 确保只用数值列（select_dtypes一遍C路径，替代逐列dtype字符串比较）
+    numeric = set(df.select_dtypes(include='number').columns)
+    feature_cols = [c for c in feature_cols if c in numeric]
+    # float32矩阵：带宽减半，也是sklearn/XGBoost偏好的布局
+    X = df[feature_cols].to_numpy(dtype=np.float32)
+    y = df['total_points'].to_numpy()
     
     # 时间序列OOS：用前70%训练，后30%测试
     split = int(len(df) * 0.7)
     X_train, X_test = X[:split], X[split:]
     y_train, y_test = y[:split], y[split:]
     
-    model.fit(X_train, y_train)
-    predictions = model.predict(X_test)
+    # refit是大头（GBM要好几秒）；训练窗口和模型参数没变时直接读上次的OOS预测，
+    # 反复调分桶/盘口线参数的迭代就只剩numpy部分
+    try:
+        params = str(sorted(model.get_params().items()))
+    except Exception:
+        params = repr(model)
+    key = hashlib.blake2b(
+        X_train.tobytes() + y_train.tobytes() + params.encode()
+    ).hexdigest()[:16]
+    cache_dir = os.path.join(PROJECT, "data", "cache")
+    cache_path = os.path.join(cache_dir, f"edge_preds_{key}.npy")
+
+    if os.path.exists(cache_path):
+        print(f"⚡ 命中预测缓存: {os.path.basename(cache_path)}")
+        predictions = np.load(cache_path)
+    else:
+        model.fit(X_train, y_train)
+        predictions = model.predict(X_test)
+        os.makedirs(cache_dir, exist_ok=True)
+        np.save(cache_path, predictions)
     actuals = y_test
     
     print(f"📊 OOS样本: {len(actuals)} 场 (后30%)")
@@ -60,33 +124,9 @@ def run_edge_analysis(model, df, feature_cols_saved):
     # 核心分析：模拟不同盘口线
     # 假设盘口 = actual_total（即市场完美定价）
     # 然后看模型预测偏离盘口X分时，actual是否真的over/under
-    
-    results = []
-    
-    for i in range(len(actuals)):
-        pred = predictions[i]
-        actual = actuals[i]
-        
-        # 模拟多个盘口线：actual±0, ±2, ±5, ±10
-        # 但更有意义的是：用actual作为"真实盘口"
-        # 然后看 pred vs actual_line → 模型说over还是under → 实际对不对
-        
-        # 方法1：用actual_total作为盘口线
-        line = actual  # 如果市场完美定价
-        deviation = pred - line
-        direction = "OVER" if deviation > 0 else "UNDER"
-        # 因为line=actual，所以hit永远是50%（这不有用）
-        
-        # 方法2：更好的方式 - 用样本均值附近的固定线
-        # 方法3：最好的方式 - 分析deviation vs actual的关系
-        results.append({
-            'prediction': pred,
-            'actual': actual,
-            'deviation_from_actual': pred - actual,  # 预测误差
-        })
-    
-    df_results = pd.DataFrame(results)
-    
+    # （预测误差一条ndarray就够了，不需要逐场build dict再转DataFrame）
+    deviation_from_actual = predictions - actuals
+
     # 关键分析：当模型预测偏离某个线X分时，实际结果如何？
     # 模拟盘口线 = 样本均值（~229分）
     mean_total = np.mean(actuals)
@@ -98,25 +138,34 @@ def run_edge_analysis(model, df, feature_cols_saved):
     print(f"分析1: 固定盘口线下的准确率")
     print(f"{'='*70}")
     
-    for line in [215, 220, 225, 228, 230, 232, 235, 240]:
-        over_pred = predictions > line  # 模型说OVER
-        over_actual = actuals > line    # 实际OVER
-        
+    # 所有盘口线一次broadcast成(N, L)矩阵，每个min_dev沿axis=0一次归约，
+    # 替代每(line, min_dev)组合重算一遍mask
+    lines = np.array([215, 220, 225, 228, 230, 232, 235, 240])
+    abs_dev_mat = np.abs(predictions[:, None] - lines[None, :])
+    correct_mat = (predictions[:, None] > lines) == (actuals[:, None] > lines)
+
+    min_devs = [0, 3, 5, 8, 10, 15]
+    sweep = {}
+    for min_dev in min_devs:
+        mask = abs_dev_mat >= min_dev
+        sweep[min_dev] = (mask.sum(axis=0), (mask & correct_mat).sum(axis=0))
+
+    for j, line in enumerate(lines):
         # 只看模型有信心的场次（偏离>N分）
-        for min_dev in [0, 3, 5, 8, 10, 15]:
-            mask = np.abs(predictions - line) >= min_dev
-            if mask.sum() < 10:
+        for min_dev in min_devs:
+            totals, corrects = sweep[min_dev]
+            total = totals[j]
+            if total < 10:
                 continue
-            
-            correct = (over_pred[mask] == over_actual[mask]).sum()
-            total = mask.sum()
+
+            correct = corrects[j]
             accuracy = correct / total * 100
-            
+
             # 计算ROI（假设赔率1.90）
             wins = correct
             losses = total - correct
             roi = (wins * 0.90 - losses) / total * 100
-            
+
             if min_dev == 0:
                 print(f"  Line {line:>3d} | 偏离≥{min_dev:>2d} | {total:>4d}场 | "
                       f"准确率{accuracy:>5.1f}% | ROI{roi:>+6.1f}%")
@@ -138,18 +187,22 @@ def run_edge_analysis(model, df, feature_cols_saved):
     bins = [(0,2), (2,4), (4,6), (6,8), (8,10), (10,15), (15,20), (20,30)]
     print(f"\n{'偏离范围':>10} {'场次':>6} {'准确率':>8} {'ROI':>8} {'方向':>8}")
     print("-" * 50)
-    
-    for lo, hi in bins:
-        mask = (np.abs(deviations) >= lo) & (np.abs(deviations) < hi)
-        if mask.sum() < 5:
+
+    # 所有桶一遍扫完，不再每桶分配一个boolean临时数组
+    edges = np.array([b[0] for b in bins] + [bins[-1][1]], dtype=np.float64)
+    n_arr, correct_arr, over_arr = _bin_counts(
+        np.abs(deviations), correct.astype(np.int64), over_pred.astype(np.int64), edges)
+
+    for b, (lo, hi) in enumerate(bins):
+        n = n_arr[b]
+        if n < 5:
             continue
-        n = mask.sum()
-        acc = correct[mask].mean() * 100
-        roi = (correct[mask].sum() * 0.90 - (~correct[mask]).sum()) / n * 100
-        
+        acc = correct_arr[b] / n * 100
+        roi = (correct_arr[b] * 0.90 - (n - correct_arr[b])) / n * 100
+
         # 看这个区间是OVER多还是UNDER多
-        over_pct = over_pred[mask].mean() * 100
-        
+        over_pct = over_arr[b] / n * 100
+
         print(f"  {lo:>2d}-{hi:<2d}分  {n:>6d} {acc:>7.1f}% {roi:>+7.1f}% {'OVER偏多' if over_pct > 60 else 'UNDER偏多' if over_pct < 40 else '均衡'}")
     
     # 分析3：用真实盘口范围（225-235）的模拟
@@ -157,27 +210,32 @@ def run_edge_analysis(model, df, feature_cols_saved):
     print(f"分析3: 真实盘口范围(225-235)模拟 — 最接近实战")
     print(f"{'='*70}")
     
-    # 对每场比赛，随机模拟一个"盘口" = actual ± uniform(-3, 3)
+    # 对每场比赛，随机模拟一个"盘口" = actual ± 噪声
     # 这模拟了市场定价不完美的情况
-    np.random.seed(42)
-    
-    for noise_std in [0, 1, 2, 3, 5]:
-        noise = np.random.normal(0, noise_std, len(actuals)) if noise_std > 0 else np.zeros(len(actuals))
-        sim_lines = actuals + noise  # 模拟盘口 = 实际结果 + 噪声
-        
-        sim_dev = predictions - sim_lines
-        sim_over_pred = sim_dev > 0
-        sim_over_actual = actuals > sim_lines
-        sim_correct = sim_over_pred == sim_over_actual
-        
-        for min_dev in [0, 3, 5, 8]:
-            mask = np.abs(sim_dev) >= min_dev
-            if mask.sum() < 10:
+    # 单位噪声抽一次、按σ缩放成(S, N)，所有噪声水平×阈值一次broadcast归约，
+    # 替代S×M遍全量数组pass
+    rng = np.random.default_rng(42)
+    noise_stds = np.array([0, 1, 2, 3, 5])
+    min_devs = np.array([0, 3, 5, 8])
+
+    unit_noise = rng.normal(0, 1, (len(noise_stds), len(actuals)))
+    sim_lines = actuals[None, :] + unit_noise * noise_stds[:, None]  # 模拟盘口
+    sim_dev = predictions[None, :] - sim_lines
+    sim_correct = (sim_dev > 0) == (actuals[None, :] > sim_lines)
+
+    # (S, N, M)的mask一次算完，沿比赛轴归约
+    mask3 = np.abs(sim_dev)[:, :, None] >= min_devs[None, None, :]
+    n_sm = mask3.sum(axis=1)
+    correct_sm = (mask3 & sim_correct[:, :, None]).sum(axis=1)
+
+    for s, noise_std in enumerate(noise_stds):
+        for m, min_dev in enumerate(min_devs):
+            n = n_sm[s, m]
+            if n < 10:
                 continue
-            n = mask.sum()
-            acc = sim_correct[mask].mean() * 100
-            roi = (sim_correct[mask].sum() * 0.90 - (~sim_correct[mask]).sum()) / n * 100
-            
+            acc = correct_sm[s, m] / n * 100
+            roi = (correct_sm[s, m] * 0.90 - (n - correct_sm[s, m])) / n * 100
+
             if min_dev == 0:
                 print(f"  噪声σ={noise_std} | 偏离≥{min_dev} | {n:>4d}场 | 准确率{acc:>5.1f}% | ROI{roi:>+6.1f}%")
             else:
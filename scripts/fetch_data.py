@@ -87,7 +87,13 @@ def save_data(df, filename):
         return
     
     filepath = DATA_DIR / filename
-    df.to_csv(filepath, index=False)
+    df.to_csv(filepath, index=False, lineterminator='\n',
+               float_format='%.3f', encoding='utf-8')
+    try:
+        # parquet副本：下游重读零解析、保留dtype
+        df.to_parquet(filepath.with_suffix('.parquet'), compression='snappy', index=False)
+    except ImportError:
+        pass  # 没装pyarrow/fastparquet就只留CSV
     print(f"💾 已保存: {filepath}")
     print(f"   行数: {len(df)}, 列数: {len(df.columns)}")
 
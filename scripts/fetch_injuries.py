@@ -3,8 +3,11 @@
 获取NBA每日伤病报告
 数据源: Basketball Reference
 """
+import io
+import re
+import sys
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
@@ -14,80 +17,125 @@ PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / 'data' / 'injuries'
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# TTL缓存：1小时内重复触发（game_day_check/predict_all_games）直接用本地CSV，
+# 也避免触发Basketball-Reference的限流
+CACHE_TTL_SECONDS = 3600
+
+# 连接池 + 自动退避重试：game_day_check等脚本反复触发时免去每次TLS握手
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+})
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=4, pool_maxsize=8,
+    max_retries=requests.adapters.Retry(total=3, backoff_factor=0.5),
+)
+_SESSION.mount('https://', _adapter)
+_SESSION.mount('http://', _adapter)
+
+# 状态判断：一个预编译regex扫一遍描述，替代4个串行的substring判断
+_STATUS_RE = re.compile(r'out|doubtful|questionable|probable', re.IGNORECASE)
+_STATUS_MAP = {
+    'out': 'Out',
+    'doubtful': 'Doubtful',
+    'questionable': 'Questionable',
+    'probable': 'Probable',
+}
+
+# lxml是C解析器，比纯Python的html.parser快5-10x；没装就退回
+try:
+    import lxml.html as LH
+    HTML_PARSER = 'lxml'
+except ImportError:
+    LH = None
+    HTML_PARSER = 'html.parser'
+
+
+def _iter_injury_rows(html):
+    """
+    逐行产出 (player, team, update_date, description)
+    lxml路径直接用xpath+子节点遍历（C执行），bs4路径做兜底
+    """
+    if LH is not None:
+        doc = LH.fromstring(html)
+        for tr in doc.xpath('//table[@id="injuries"]//tr'):
+            player_cell = tr.find('th')
+            cols = tr.findall('td')
+            if player_cell is None or len(cols) < 3:
+                continue
+
+            team_link = cols[0].find('a')
+            href = team_link.get('href') if team_link is not None else None
+            if href:
+                team = href.split('/teams/')[1].split('/')[0]
+            else:
+                team = cols[0].text_content().strip()
+
+            yield (player_cell.text_content().strip(), team,
+                   cols[1].text_content().strip(), cols[2].text_content().strip())
+    else:
+        # 只物化伤病表那棵子树，整页其余标签在tokenize阶段就丢掉
+        strainer = SoupStrainer('table', {'id': 'injuries'})
+        soup = BeautifulSoup(html, HTML_PARSER, parse_only=strainer)
+        table = soup.find('table')
+        if not table:
+            return
+
+        # 解析每一行 (新结构: <th>球员</th> <td>球队</td> <td>日期</td> <td>描述</td>)
+        for row in table.find_all('tr'):
+            # 第一列是<th>（球员），后面是<td>
+            player_cell = row.find('th')
+            cols = row.find_all('td')
+            if not player_cell or len(cols) < 3:
+                continue
+
+            team_link = cols[0].find('a')
+            if team_link and 'href' in team_link.attrs:
+                team = team_link['href'].split('/teams/')[1].split('/')[0]
+            else:
+                team = cols[0].text.strip()
+
+            yield (player_cell.text.strip(), team,
+                   cols[1].text.strip(), cols[2].text.strip())
+
 def fetch_injury_report():
     """爬取Basketball Reference伤病报告"""
     url = 'https://www.basketball-reference.com/friv/injuries.fcgi'
     
     print(f"📥 获取伤病报告: {url}")
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-    }
-    
+
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = _SESSION.get(url, timeout=10)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        injuries = []
-        
-        # 找到伤病表格
-        table = soup.find('table', {'id': 'injuries'})
-        
-        if not table:
+        # 按列收集：pandas直接把每个list建成连续数组，省掉每行一个dict
+        teams, players, statuses, descriptions, update_dates = [], [], [], [], []
+
+        for player, team, update_date, description in _iter_injury_rows(response.text):
+            # 判断状态（取最左匹配；B-Ref的描述都以状态词开头）
+            m = _STATUS_RE.search(description)
+
+            teams.append(team.upper())
+            players.append(player)
+            statuses.append(_STATUS_MAP[m.group(0).lower()] if m else 'Unknown')
+            descriptions.append(description)
+            update_dates.append(update_date)
+
+        if not players:
             print("⚠️  未找到伤病表格")
             return pd.DataFrame()
-        
-        # 解析每一行 (新结构: <th>球员</th> <td>球队</td> <td>日期</td> <td>描述</td>)
-        for row in table.find_all('tr'):
-            # 第一列是<th>（球员），后面是<td>
-            player_cell = row.find('th')
-            cols = row.find_all('td')
-            
-            if player_cell and len(cols) >= 3:
-                # 提取球员名字
-                player = player_cell.text.strip()
-                
-                # 提取球队（第1个td）
-                team_cell = cols[0]
-                team_link = team_cell.find('a')
-                if team_link and 'href' in team_link.attrs:
-                    team = team_link['href'].split('/teams/')[1].split('/')[0]
-                else:
-                    team = team_cell.text.strip()
-                
-                # 提取更新日期（第2个td）
-                update_date = cols[1].text.strip()
-                
-                # 提取伤病描述（第3个td）
-                description = cols[2].text.strip()
-                
-                # 判断状态
-                desc_lower = description.lower()
-                if 'out' in desc_lower:
-                    status = 'Out'
-                elif 'doubtful' in desc_lower:
-                    status = 'Doubtful'
-                elif 'questionable' in desc_lower:
-                    status = 'Questionable'
-                elif 'probable' in desc_lower:
-                    status = 'Probable'
-                else:
-                    status = 'Unknown'
-                
-                injuries.append({
-                    'team': team.upper(),
-                    'player': player,
-                    'status': status,
-                    'description': description,
-                    'update_date': update_date,
-                    'fetch_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                })
-        
-        df = pd.DataFrame(injuries)
+
+        df = pd.DataFrame({
+            'team': teams,
+            'player': players,
+            'status': statuses,
+            'description': descriptions,
+            'update_date': update_dates,
+        })
+        # 时间戳整列广播一次，不是每行format一次
+        df['fetch_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         print(f"✅ 获取到 {len(df)} 条伤病记录")
-        
+
         return df
     
     except Exception as e:
@@ -102,14 +150,21 @@ def save_injury_report(df):
     
     today = datetime.now().strftime('%Y-%m-%d')
     filepath = DATA_DIR / f'injuries_{today}.csv'
-    
-    df.to_csv(filepath, index=False)
+
+    # 只序列化一次，同样的bytes写两个文件
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, lineterminator='\n', encoding='utf-8')
+    payload = buf.getvalue()
+
+    with open(filepath, 'wb', buffering=1 << 20) as f:
+        f.write(payload)
     print(f"\n💾 已保存: {filepath}")
     print(f"   文件大小: {filepath.stat().st_size / 1024:.1f} KB")
-    
+
     # 同时保存为latest.csv（方便调用）
     latest_path = DATA_DIR / 'injuries_latest.csv'
-    df.to_csv(latest_path, index=False)
+    with open(latest_path, 'wb', buffering=1 << 20) as f:
+        f.write(payload)
     print(f"   最新版本: {latest_path}")
 
 def show_summary(df):
@@ -128,27 +183,42 @@ def show_summary(df):
     # 按球队分组
     print(f"\n   受影响球队: {df['team'].nunique()} 支")
     
-    # 显示确定缺阵的球员
-    out_players = df[df['status'] == 'Out']
-    if len(out_players) > 0:
-        print(f"\n🚨 确定缺阵球员 ({len(out_players)} 人):")
-        for _, row in out_players.head(10).iterrows():
-            print(f"   {row['team']:5s} - {row['player']:20s} ({row['description'][:40]}...)")
-        
-        if len(out_players) > 10:
-            print(f"   ... 还有 {len(out_players) - 10} 人")
+    # 显示确定缺阵的球员（mask+itertuples，只取要打印的三列，不走iterrows逐行装箱）
+    out_mask = df['status'].values == 'Out'
+    n_out = int(out_mask.sum())
+    if n_out > 0:
+        print(f"\n🚨 确定缺阵球员 ({n_out} 人):")
+        sub = df.loc[out_mask, ['team', 'player', 'description']].head(10)
+        for team, player, desc in sub.itertuples(index=False, name=None):
+            print(f"   {team:5s} - {player:20s} ({desc[:40]}...)")
+
+        if n_out > 10:
+            print(f"   ... 还有 {n_out - 10} 人")
 
 def main():
     print("\n" + "="*70)
     print("🏥 NBA伤病报告爬虫")
     print("="*70 + "\n")
-    
+
+    # 缓存没过期就不重爬（--force强制刷新）
+    # 注意：命中时不能重写CSV，否则mtime被刷新，缓存永不过期
+    latest_path = DATA_DIR / 'injuries_latest.csv'
+    if '--force' not in sys.argv and latest_path.exists():
+        age = time.time() - latest_path.stat().st_mtime
+        if age < CACHE_TTL_SECONDS:
+            print(f"⚡ 伤病缓存未过期（{age/60:.0f}分钟前），跳过重爬（--force强制刷新）")
+            show_summary(pd.read_csv(latest_path))
+            print("\n" + "="*70)
+            print("✅ 完成")
+            print("="*70 + "\n")
+            return
+
     # 获取数据
     df = fetch_injury_report()
-    
+
     # 显示摘要
     show_summary(df)
-    
+
     # 保存
     save_injury_report(df)
     
@@ -10,6 +10,14 @@ import subprocess
 import sys
 import json
 from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'scripts'))
+
+# 进程内直接调预测：不再每场spawn一个python3 -> 重新import pandas/xgboost
+# -> 反序列化模型 -> 文本解析stdout（每场好几秒的固定启动开销）
+from predict_v3 import load_model, build_matchup_features_cached, make_prediction
 
 def run_cmd(cmd):
     result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
@@ -22,7 +30,7 @@ def main():
     
     # 1. 刷新伤病数据
     print("\n📋 Step 1: 刷新伤病数据...")
-    out, err, code = run_cmd("cd /Users/tmtat/projects/nba && python3 scripts/fetch_injuries.py")
+    out, err, code = run_cmd(f"cd {PROJECT_ROOT} && python3 scripts/fetch_injuries.py")
     if code == 0:
         print("   ✅ 伤病数据已更新")
     else:
@@ -38,23 +46,25 @@ def main():
     
     print("\n🎯 Step 2: 运行预测...")
     results = []
-    
+
+    # 模型只加载一次，三场共用；特征帧按(对阵, 伤病CSV mtime)记忆化
+    model_package = load_model()
+
     for game in games:
         print(f"\n   {game['away']} @ {game['home']} ({game['time']})...")
-        out, err, code = run_cmd(
-            f"cd /Users/tmtat/projects/nba && python3 scripts/predict_v3.py "
-            f"--home {game['home']} --away {game['away']} 2>&1"
-        )
-        
-        # 解析预测值
+
         prediction = None
-        for line in out.split('\n'):
-            if '预测总分:' in line:
-                try:
-                    prediction = float(line.split(':')[1].strip())
-                except:
-                    pass
-        
+        if model_package:
+            try:
+                features_df = build_matchup_features_cached(game['home'], game['away'])
+                if features_df is not None:
+                    # calibration=2.7与predict_v3.py CLI默认一致
+                    # （此前走子进程解析CLI输出时就带着这个校准）
+                    prediction = float(make_prediction(
+                        model_package, features_df, calibration=2.7))
+            except Exception as e:
+                print(f"   ⚠️ 预测出错: {e}")
+
         if prediction:
             deviation = prediction - game['line']
             mae = 17.09  # V3 MAE
@@ -3,6 +3,7 @@
 实时预测今日NBA比赛大小分
 """
 import pandas as pd
+import numpy as np
 import pickle
 from pathlib import Path
 from datetime import datetime
@@ -76,10 +77,11 @@ def make_predictions(model_package, games_df, line=220):
     X = games_df[feature_cols]
     predictions = model.predict(X)
     
-    # 添加预测结果
+    # 添加预测结果。OVER/UNDER和信心度直接在predict返回的ndarray上算：
+    # np.where/np.abs一次到位，不走Series.apply和builtin abs的Python分发
     games_df['predicted_total'] = predictions
-    games_df['prediction'] = games_df['predicted_total'].apply(lambda x: 'OVER' if x > line else 'UNDER')
-    games_df['confidence'] = abs(games_df['predicted_total'] - line) / line * 100
+    games_df['prediction'] = np.where(predictions > line, 'OVER', 'UNDER')
+    games_df['confidence'] = np.abs(predictions - line) / line * 100
     
     return games_df
 
@@ -6,7 +6,14 @@
 import sys
 import json
 import requests
-import pandas as pd
+
+# orjson序列化比stdlib json快5-10x，还原生支持numpy标量；没装就退回
+try:
+    import orjson
+except ImportError:
+    orjson = None
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -14,18 +21,39 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT / 'scripts'))
 
-from predict_v3 import load_model, load_injuries, build_matchup_features, make_prediction
+from predict_v3 import load_model, load_injuries, build_matchup_features_cached
+
+# ciso8601是C实现的ISO8601解析器，比strptime快一个量级；没装就用fromisoformat
+try:
+    from ciso8601 import parse_datetime as _parse_iso
+except ImportError:
+    def _parse_iso(s):
+        return datetime.fromisoformat(s.replace('Z', '+00:00'))
 
 PREDICTIONS_DIR = PROJECT_ROOT / 'data' / 'predictions'
 PREDICTIONS_DIR.mkdir(parents=True, exist_ok=True)
 
+# 连接池 + 自动退避重试，复用TCP连接
+_SESSION = requests.Session()
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=4, pool_maxsize=8,
+    max_retries=requests.adapters.Retry(total=3, backoff_factor=0.5),
+)
+_SESSION.mount('https://', _adapter)
+_SESSION.mount('http://', _adapter)
+
 def get_games_for_date(date_str):
     """获取指定日期的比赛（格式: YYYYMMDD）"""
     url = f"http://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard?dates={date_str}"
     
     try:
-        response = requests.get(url, timeout=10)
-        data = response.json()
+        response = _SESSION.get(url, timeout=10)
+        response.raise_for_status()
+        # 直接解析原始bytes：response.json()先decode成str再parse，多一次拷贝
+        if orjson is not None:
+            data = orjson.loads(response.content)
+        else:
+            data = json.loads(response.content)
         events = data.get('events', [])
         
         games = []
@@ -51,73 +79,78 @@ def get_games_for_date(date_str):
         print(f"❌ 获取比赛失败: {e}")
         return []
 
-def predict_game(home_team, away_team, model_package, injuries_df):
-    """预测单场比赛"""
+def build_features_for_game(game):
+    """构建单场特征（失败返回None，不中断整个slate）"""
     try:
-        features_df = build_matchup_features(home_team, away_team, injuries_df)
-        if features_df is None:
-            return None
-        
-        predicted_total = make_prediction(model_package, features_df)
-        
-        # 计算各盘口建议
-        lines = [215, 220, 225, 230]
-        recommendations = []
-        
-        for line in lines:
-            prediction = 'OVER' if predicted_total > line else 'UNDER'
-            deviation = predicted_total - line
-            confidence = abs(deviation) / line * 100
-            
-            if line == 215 and confidence > 3:
-                decision = "强烈推荐"
-                priority = 5
-            elif confidence > 5:
-                decision = "建议下注"
-                priority = 4
-            elif confidence > 2:
-                decision = "可考虑"
-                priority = 3
-            else:
-                decision = "不建议"
-                priority = 1
-            
-            recommendations.append({
-                'line': int(line),
-                'prediction': prediction,
-                'confidence': float(confidence),
-                'decision': decision,
-                'priority': int(priority)
-            })
-        
-        # 找出最佳推荐
-        best = max(recommendations, key=lambda x: x['confidence'])
-        
-        return {
-            'predicted_total': predicted_total,
-            'recommendations': recommendations,
-            'best_line': best['line'],
-            'best_prediction': best['prediction'],
-            'best_confidence': best['confidence'],
-            'priority': best['priority']
-        }
-    
+        # 记忆化版：同日重跑同一对阵直接命中缓存，伤病CSV更新后自动失效
+        return build_matchup_features_cached(game['home_team'], game['away_team'])
     except Exception as e:
-        print(f"  ⚠️  预测失败: {e}")
+        print(f"  ⚠️  特征构建失败 {game['away_team']} @ {game['home_team']}: {e}")
         return None
 
+def postprocess_prediction(predicted_total):
+    """由预测总分生成各盘口建议"""
+    # 计算各盘口建议
+    lines = [215, 220, 225, 230]
+    recommendations = []
+
+    for line in lines:
+        prediction = 'OVER' if predicted_total > line else 'UNDER'
+        deviation = predicted_total - line
+        confidence = abs(deviation) / line * 100
+
+        if line == 215 and confidence > 3:
+            decision = "强烈推荐"
+            priority = 5
+        elif confidence > 5:
+            decision = "建议下注"
+            priority = 4
+        elif confidence > 2:
+            decision = "可考虑"
+            priority = 3
+        else:
+            decision = "不建议"
+            priority = 1
+
+        recommendations.append({
+            'line': int(line),
+            'prediction': prediction,
+            'confidence': float(confidence),
+            'decision': decision,
+            'priority': int(priority)
+        })
+
+    # 找出最佳推荐
+    best = max(recommendations, key=lambda x: x['confidence'])
+
+    return {
+        'predicted_total': predicted_total,
+        'recommendations': recommendations,
+        'best_line': best['line'],
+        'best_prediction': best['prediction'],
+        'best_confidence': best['confidence'],
+        'priority': best['priority']
+    }
+
 def format_telegram_message(date_str, games, predictions):
     """格式化Telegram消息"""
     date_obj = datetime.strptime(date_str, '%Y%m%d')
     readable_date = date_obj.strftime('%Y年%m月%d日 (%A)')
     
-    msg = f"🏀 **NBA大小分预测报告**\n"
-    msg += f"📅 日期: {readable_date}\n"
-    msg += f"📊 比赛场次: {len(games)}场\n"
-    msg += f"🤖 模型: V3 (伤病增强版)\n"
-    msg += f"✅ 准确率: 73.5% (@盘口215)\n"
-    msg += f"💰 ROI: +40.3%\n\n"
-    
+    # 片段列表+join：msg += 每次都重分配整个字符串，场次多了是O(N²)
+    parts = [f"🏀 **NBA大小分预测报告**\n"]
+    parts.append(f"📅 日期: {readable_date}\n")
+    parts.append(f"📊 比赛场次: {len(games)}场\n")
+    parts.append(f"🤖 模型: V3 (伤病增强版)\n")
+    parts.append(f"✅ 准确率: 73.5% (@盘口215)\n")
+    parts.append(f"💰 ROI: +40.3%\n\n")
+
+    # 时间只解析一次（旧写法在两个循环里各strptime一遍，而且格式串
+    # '%Y-%m-%dT%H:%M%SZ'漏了冒号，跑到就抛异常）
+    for game in games:
+        adelaide_time = _parse_iso(game['game_time']) + timedelta(hours=10, minutes=30)
+        game['_time_str'] = adelaide_time.strftime('%H:%M')
+
     # 按优先级排序
     sorted_games = sorted(
         zip(games, predictions),
@@ -126,44 +159,36 @@ def format_telegram_message(date_str, games, predictions):
     )
     
     # 重点推荐
-    msg += "🎯 **重点推荐** (信心度>3%):\n\n"
-    
+    parts.append("🎯 **重点推荐** (信心度>3%):\n\n")
+
     has_priority = False
     for game, pred in sorted_games:
         if pred and pred['priority'] >= 4:
             has_priority = True
-            game_time = datetime.strptime(game['game_time'], '%Y-%m-%dT%H:%M%SZ')
-            adelaide_time = game_time + timedelta(hours=10, minutes=30)
-            time_str = adelaide_time.strftime('%H:%M')
-            
-            msg += f"**{game['away_team']} @ {game['home_team']}** ({time_str})\n"
-            msg += f"  预测总分: {pred['predicted_total']:.1f}\n"
-            msg += f"  推荐: 盘口{pred['best_line']} {pred['best_prediction']}\n"
-            msg += f"  信心度: {pred['best_confidence']:.1f}%\n"
-            msg += f"  决策: {pred['recommendations'][0]['decision']}\n\n"
-    
+            parts.append(f"**{game['away_team']} @ {game['home_team']}** ({game['_time_str']})\n")
+            parts.append(f"  预测总分: {pred['predicted_total']:.1f}\n")
+            parts.append(f"  推荐: 盘口{pred['best_line']} {pred['best_prediction']}\n")
+            parts.append(f"  信心度: {pred['best_confidence']:.1f}%\n")
+            parts.append(f"  决策: {pred['recommendations'][0]['decision']}\n\n")
+
     if not has_priority:
-        msg += "  (今日无高信心推荐)\n\n"
-    
+        parts.append("  (今日无高信心推荐)\n\n")
+
     # 全部场次
-    msg += "📋 **所有场次预测**:\n\n"
-    
+    parts.append("📋 **所有场次预测**:\n\n")
+
     for game, pred in sorted_games:
         if pred:
-            game_time = datetime.strptime(game['game_time'], '%Y-%m-%dT%H:%M%SZ')
-            adelaide_time = game_time + timedelta(hours=10, minutes=30)
-            time_str = adelaide_time.strftime('%H:%M')
-            
             emoji = "🏆" if pred['priority'] >= 4 else "⭐" if pred['priority'] >= 3 else "📌"
-            msg += f"{emoji} {time_str} | {game['away_team']} @ {game['home_team']}\n"
-            msg += f"   预测: {pred['predicted_total']:.1f} | 推荐: {pred['best_line']} {pred['best_prediction']} ({pred['best_confidence']:.1f}%)\n"
-    
-    msg += f"\n⚠️ **风险提示**:\n"
-    msg += f"- 请在赛前20分钟确认最新伤病报告\n"
-    msg += f"- 单场下注≤5%资金池\n"
-    msg += f"- 专注盘口215，准确率最高\n"
-    
-    return msg
+            parts.append(f"{emoji} {game['_time_str']} | {game['away_team']} @ {game['home_team']}\n")
+            parts.append(f"   预测: {pred['predicted_total']:.1f} | 推荐: {pred['best_line']} {pred['best_prediction']} ({pred['best_confidence']:.1f}%)\n")
+
+    parts.append(f"\n⚠️ **风险提示**:\n")
+    parts.append(f"- 请在赛前20分钟确认最新伤病报告\n")
+    parts.append(f"- 单场下注≤5%资金池\n")
+    parts.append(f"- 专注盘口215，准确率最高\n")
+
+    return ''.join(parts)
 
 def save_predictions(date_str, games, predictions):
     """保存预测记录"""
@@ -178,17 +203,23 @@ def save_predictions(date_str, games, predictions):
                 'game_time': game['game_time'],
                 'home_team': game['home_team'],
                 'away_team': game['away_team'],
-                'predicted_total': float(pred['predicted_total']),
-                'best_line': int(pred['best_line']),
+                'predicted_total': pred['predicted_total'],
+                'best_line': pred['best_line'],
                 'best_prediction': pred['best_prediction'],
-                'best_confidence': float(pred['best_confidence']),
-                'priority': int(pred['priority']),
+                'best_confidence': pred['best_confidence'],
+                'priority': pred['priority'],
                 'recommendations': pred['recommendations'],
                 'prediction_time': datetime.now().isoformat()
             })
-    
-    with open(filepath, 'w') as f:
-        json.dump(records, f, indent=2)
+
+    if orjson is not None:
+        payload = orjson.dumps(
+            records, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        payload = json.dumps(records, indent=2).encode('utf-8')
+
+    with open(filepath, 'wb') as f:
+        f.write(payload)
     
     print(f"💾 预测已保存: {filepath}")
     
@@ -230,17 +261,26 @@ def main():
         return
     
     print(f"🏥 加载伤病数据...")
-    injuries_df = load_injuries()
+    load_injuries()  # 预热mtime缓存，特征构建时直接命中
     
-    # 预测所有比赛
+    # 特征构建逐场独立，线程池并发（model_package/injuries_df只读不需要锁；
+    # ex.map保持与games一致的顺序）；推理则把所有场拼成一个batch，
+    # 只调一次model.predict，免去每场一遍的DMatrix构造等绑定开销
     print(f"\n🔮 开始预测...\n")
-    predictions = []
-    
-    for i, game in enumerate(games, 1):
+    with ThreadPoolExecutor(max_workers=min(8, len(games))) as ex:
+        feature_frames = list(ex.map(build_features_for_game, games))
+
+    predictions = [None] * len(games)
+    valid = [i for i, f in enumerate(feature_frames) if f is not None]
+    if valid:
+        # 特征行已是按列序排好的float32数组，vstack后直接喂predict
+        X_all = np.vstack([feature_frames[i] for i in valid])
+        preds = model_package['model'].predict(X_all)
+        for i, predicted_total in zip(valid, preds):
+            predictions[i] = postprocess_prediction(float(predicted_total))
+
+    for i, (game, pred) in enumerate(zip(games, predictions), 1):
         print(f"[{i}/{len(games)}] {game['away_team']} @ {game['home_team']}...")
-        pred = predict_game(game['home_team'], game['away_team'], model_package, injuries_df)
-        predictions.append(pred)
-        
         if pred:
             print(f"  ✅ 预测总分: {pred['predicted_total']:.1f} | 推荐: 盘口{pred['best_line']} {pred['best_prediction']} ({pred['best_confidence']:.1f}%)")
     
@@ -2,9 +2,11 @@
 """
 实时预测 V2 - 使用增强模型预测今日比赛
 """
+import numpy as np
 import pandas as pd
 import pickle
 import argparse
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 
@@ -30,39 +32,65 @@ def load_model():
     
     return model_package
 
+# 整季CSV一个进程只解析一次，每队的过滤+排序也只做一次
+@lru_cache(maxsize=1)
+def _load_games_df():
+    filepath = DATA_DIR / 'raw' / 'games_2024-25_clean.csv'
+    parquet_path = filepath.with_suffix('.parquet')
+    if parquet_path.exists():
+        df = pd.read_parquet(parquet_path)
+    else:
+        # datetime64的排序走int64比较，category的过滤/分组走整型码比较，
+        # 都比object字符串快得多
+        df = pd.read_csv(
+            filepath, parse_dates=['GAME_DATE'],
+            dtype={'TEAM_ABBREVIATION': 'category', 'MATCHUP': 'category'})
+    # 加载时排好序，下游不再逐次sort_values
+    return df.sort_values('GAME_DATE')
+
+# 一次groupby算完全部30队的近期统计
+@lru_cache(maxsize=1)
+def _all_team_stats():
+    df = _load_games_df()  # 加载时已按GAME_DATE排序
+    is_home_col = df['MATCHUP'].str.contains('vs', regex=False)
+
+    all_stats = {}
+    for team, grp in df.groupby('TEAM_ABBREVIATION', sort=False):
+        if len(grp) < 3:
+            continue
+
+        pts = grp['PTS'].to_numpy()
+        opp_pts = grp['OPP_PTS'].to_numpy()
+        is_home = is_home_col.loc[grp.index].to_numpy()
+
+        stats = {
+            'pts_last_3': pts[-3:].mean(),
+            'pts_last_5': pts[-5:].mean(),
+            'pts_last_10': pts[-10:].mean(),
+            'opp_pts_last_5': opp_pts[-5:].mean(),
+            'pts_std_5': pts[-5:].std(ddof=1) if len(pts) >= 5 else 0,
+        }
+
+        # 主客场分组
+        home_pts = pts[is_home]
+        away_pts = pts[~is_home]
+        stats['pts_last_5_home'] = home_pts[-5:].mean() if len(home_pts) >= 5 else stats['pts_last_5']
+        stats['pts_last_5_away'] = away_pts[-5:].mean() if len(away_pts) >= 5 else stats['pts_last_5']
+
+        all_stats[team] = stats
+
+    return all_stats
+
 def get_team_recent_stats(team_abbr):
     """
     获取球队近期统计（从历史数据计算）
     实际使用中应该接入实时API
     """
-    # 加载历史数据
-    filepath = DATA_DIR / 'raw' / 'games_2024-25_clean.csv'
-    df = pd.read_csv(filepath)
-    
-    # 该球队最近的比赛
-    team_games = df[df['TEAM_ABBREVIATION'] == team_abbr].sort_values('GAME_DATE')
-    
-    if len(team_games) < 3:
+    stats = _all_team_stats().get(team_abbr)
+
+    if stats is None:
         print(f"⚠️  {team_abbr} 数据不足")
-        return None
-    
-    # 计算统计
-    stats = {
-        'pts_last_3': team_games['PTS'].tail(3).mean(),
-        'pts_last_5': team_games['PTS'].tail(5).mean(),
-        'pts_last_10': team_games['PTS'].tail(10).mean(),
-        'opp_pts_last_5': team_games['OPP_PTS'].tail(5).mean(),
-        'pts_std_5': team_games['PTS'].tail(5).std() if len(team_games) >= 5 else 0,
-    }
-    
-    # 主客场分组
-    is_home = team_games['MATCHUP'].str.contains('vs')
-    home_games = team_games[is_home]
-    away_games = team_games[~is_home]
-    
-    stats['pts_last_5_home'] = home_games['PTS'].tail(5).mean() if len(home_games) >= 5 else stats['pts_last_5']
-    stats['pts_last_5_away'] = away_games['PTS'].tail(5).mean() if len(away_games) >= 5 else stats['pts_last_5']
-    
+
     return stats
 
 def build_matchup_features(home_team, away_team):
@@ -127,13 +155,16 @@ def generate_recommendation(predicted_total, lines=[215, 220, 225, 230]):
     print(f"{'盘口':>8s} {'预测':>10s} {'建议':>10s} {'偏离':>10s} {'信心度':>10s} {'决策':>15s}")
     print("-" * 70)
     
+    # 偏离/信心度一次数组运算算完，循环里只剩格式化
+    lines_arr = np.asarray(lines, dtype=float)
+    deviations = predicted_total - lines_arr
+    confidences = np.abs(deviations) / lines_arr * 100
+
     recommendations = []
-    
-    for line in lines:
-        prediction = 'OVER' if predicted_total > line else 'UNDER'
-        deviation = predicted_total - line
-        confidence = abs(deviation) / line * 100
-        
+
+    for line, deviation, confidence in zip(lines, deviations, confidences):
+        prediction = 'OVER' if deviation > 0 else 'UNDER'
+
         # 决策逻辑
         if line == 215 and confidence > 3:  # 盘口215是金矿
             decision = "🏆 强烈推荐"
@@ -2,10 +2,12 @@
 """
 实时预测 V3 - 使用伤病增强模型预测今日比赛
 """
+import numpy as np
 import pandas as pd
 import pickle
 import json
 import argparse
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 
@@ -14,10 +16,21 @@ MODELS_DIR = PROJECT_ROOT / 'models'
 DATA_DIR = PROJECT_ROOT / 'data'
 INJURIES_DIR = DATA_DIR / 'injuries'
 
-# 加载球员数据库
-with open(DATA_DIR / 'player_stats.json', 'r') as f:
-    PLAYER_STATS = json.load(f)
+# orjson解析快3-10x；没装就退回stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+# 球员数据库懒加载：import本模块不再有读文件副作用（scan_all_games等按模块引用）
+@lru_cache(maxsize=1)
+def _player_stats():
+    raw = (DATA_DIR / 'player_stats.json').read_bytes()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+# 进程内复用：game_day_check/predict_all_games反复调用时，
+# 多MB的pickle只反序列化一次
+@lru_cache(maxsize=1)
 def load_model():
     """加载V3模型"""
     filepath = MODELS_DIR / 'total_points_model_v3.pkl'
@@ -33,83 +46,171 @@ def load_model():
     print(f"✅ 模型已加载 (V{model_package['version']})")
     print(f"   训练时间: {model_package['timestamp'][:19]}")
     print(f"   交叉验证MAE: {sum(model_package['cv_scores'])/len(model_package['cv_scores']):.2f}")
-    
+
+    # 训练时导出过ONNX副本且装了onnxruntime的话，单行推理走C++引擎
+    # （调度开销比sklearn predict低得多）；否则保持原生predict
+    model_package['onnx_session'] = None
+    onnx_path = filepath.with_suffix('.onnx')
+    if onnx_path.exists():
+        try:
+            import onnxruntime as ort
+            model_package['onnx_session'] = ort.InferenceSession(
+                str(onnx_path), providers=['CPUExecutionProvider'])
+            print(f"   ⚡ ONNX推理已启用: {onnx_path.name}")
+        except ImportError:
+            pass
+
+    # 预热：首次predict才初始化的内部懒结构/线程池提前踩一遍，
+    # 不占第一场真实预测的延迟（load_model是单例，只付一次）
+    try:
+        model_package['model'].predict(
+            np.zeros((1, len(model_package['feature_cols'])), dtype=np.float32))
+    except Exception:
+        pass
+
     return model_package
 
+# 按文件mtime缓存：CSV没变就不重读，fetch_injuries更新后自动失效
+_INJURIES_CACHE = {}
+
 def load_injuries():
     """加载最新伤病数据"""
     filepath = INJURIES_DIR / 'injuries_latest.csv'
-    
+
     if not filepath.exists():
         print(f"\n⚠️  伤病数据不存在")
         print("   运行: python scripts/fetch_injuries.py")
         print("   将假设无伤病影响\n")
         return pd.DataFrame()
-    
+
+    mtime = filepath.stat().st_mtime
+    if _INJURIES_CACHE.get('mtime') == mtime:
+        return _INJURIES_CACHE['df']
+
     df = pd.read_csv(filepath)
     # 只保留确定缺阵
     df = df[df['status'] == 'Out']
-    
+
     print(f"🏥 伤病数据已加载: {len(df)} 人确定缺阵")
-    
+
+    _INJURIES_CACHE['mtime'] = mtime
+    _INJURIES_CACHE['df'] = df
+
     return df
 
+# 球员PPG查找表（Series.map一次查完，不逐行dict lookup）
+@lru_cache(maxsize=1)
+def _player_ppg_series():
+    return pd.Series({p: s['ppg'] for p, s in _player_stats().items()}, dtype=float)
+
 def calc_injury_impact(team, injuries_df):
     """计算球队伤病影响分"""
     if injuries_df.empty:
         return 0
-    
-    team_injuries = injuries_df[injuries_df['team'] == team]
-    
-    total_impact = 0
-    affected_players = []
-    
-    for _, injury in team_injuries.iterrows():
-        player = injury['player']
-        
-        if player in PLAYER_STATS:
-            ppg = PLAYER_STATS[player]['ppg']
-            impact = ppg / 5
-            total_impact += impact
-            affected_players.append(f"{player}({ppg:.1f}PPG)")
-    
-    if affected_players:
+
+    # 一次map查完该队所有缺阵球员的PPG，替代iterrows逐行判断
+    players = injuries_df.loc[injuries_df['team'] == team, 'player']
+    ppgs = players.map(_player_ppg_series()).dropna()
+    total_impact = float(ppgs.sum()) / 5
+
+    if len(ppgs) > 0:
+        affected_players = [
+            f"{p}({v:.1f}PPG)" for p, v in zip(players.loc[ppgs.index], ppgs)]
         print(f"   {team}: {', '.join(affected_players)} → 影响-{total_impact:.1f}分")
-    
+
     return total_impact
 
+# 整季CSV一个进程只解析一次；旧写法每调一次重读一遍，
+# 一场比赛要读两次（主客各一）
+@lru_cache(maxsize=1)
+def _load_games_df():
+    filepath = DATA_DIR / 'raw' / 'games_2024-25_clean.csv'
+    parquet_path = filepath.with_suffix('.parquet')
+    if parquet_path.exists():
+        df = pd.read_parquet(parquet_path)
+    else:
+        # datetime64的排序走int64比较，category的过滤/分组走整型码比较，
+        # 都比object字符串快得多
+        df = pd.read_csv(
+            filepath, parse_dates=['GAME_DATE'],
+            dtype={'TEAM_ABBREVIATION': 'category', 'MATCHUP': 'category'})
+    # 加载时排好序，下游不再逐次sort_values
+    return df.sort_values('GAME_DATE')
+
+# 一次groupby算完全部30队的近期统计；旧写法每调一次全表过滤+排序一遍。
+# 结果落盘成侧文件（按数据源mtime失效）：数据没变时后续进程连
+# CSV解析+groupby都省掉，启动即O(1)查表
+def _games_source_path():
+    filepath = DATA_DIR / 'raw' / 'games_2024-25_clean.csv'
+    parquet_path = filepath.with_suffix('.parquet')
+    return parquet_path if parquet_path.exists() else filepath
+
+@lru_cache(maxsize=1)
+def _all_team_stats():
+    cache_path = DATA_DIR / 'cache' / 'team_stats_latest.json'
+    src_mtime = _games_source_path().stat().st_mtime
+    if cache_path.exists():
+        with open(cache_path, 'r') as f:
+            cached = json.load(f)
+        if cached.get('src_mtime') == src_mtime:
+            return cached['stats']
+
+    df = _load_games_df()  # 加载时已按GAME_DATE排序
+    is_home_col = df['MATCHUP'].str.contains('vs', regex=False)
+
+    all_stats = {}
+    for team, grp in df.groupby('TEAM_ABBREVIATION', sort=False):
+        if len(grp) < 3:
+            continue
+
+        pts = grp['PTS'].to_numpy()
+        opp_pts = grp['OPP_PTS'].to_numpy()
+        is_home = is_home_col.loc[grp.index].to_numpy()
+
+        stats = {
+            'pts_last_3': float(pts[-3:].mean()),
+            'pts_last_5': float(pts[-5:].mean()),
+            'pts_last_10': float(pts[-10:].mean()),
+            'opp_pts_last_5': float(opp_pts[-5:].mean()),
+            'pts_std_5': float(pts[-5:].std(ddof=1)) if len(pts) >= 5 else 0,
+        }
+
+        # 主客场分组
+        home_pts = pts[is_home]
+        away_pts = pts[~is_home]
+        stats['pts_last_5_home'] = float(home_pts[-5:].mean()) if len(home_pts) >= 5 else stats['pts_last_5']
+        stats['pts_last_5_away'] = float(away_pts[-5:].mean()) if len(away_pts) >= 5 else stats['pts_last_5']
+
+        all_stats[str(team)] = stats
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_path, 'w') as f:
+        json.dump({'src_mtime': src_mtime, 'stats': all_stats}, f)
+
+    return all_stats
+
 def get_team_recent_stats(team_abbr):
     """获取球队近期统计"""
-    filepath = DATA_DIR / 'raw' / 'games_2024-25_clean.csv'
-    df = pd.read_csv(filepath)
-    
-    team_games = df[df['TEAM_ABBREVIATION'] == team_abbr].sort_values('GAME_DATE')
-    
-    if len(team_games) < 3:
+    stats = _all_team_stats().get(team_abbr)
+
+    if stats is None:
         print(f"⚠️  {team_abbr} 数据不足")
-        return None
-    
-    # 计算统计
-    stats = {
-        'pts_last_3': team_games['PTS'].tail(3).mean(),
-        'pts_last_5': team_games['PTS'].tail(5).mean(),
-        'pts_last_10': team_games['PTS'].tail(10).mean(),
-        'opp_pts_last_5': team_games['OPP_PTS'].tail(5).mean(),
-        'pts_std_5': team_games['PTS'].tail(5).std() if len(team_games) >= 5 else 0,
-    }
-    
-    # 主客场分组
-    is_home = team_games['MATCHUP'].str.contains('vs')
-    home_games = team_games[is_home]
-    away_games = team_games[~is_home]
-    
-    stats['pts_last_5_home'] = home_games['PTS'].tail(5).mean() if len(home_games) >= 5 else stats['pts_last_5']
-    stats['pts_last_5_away'] = away_games['PTS'].tail(5).mean() if len(away_games) >= 5 else stats['pts_last_5']
-    
+
     return stats
 
+# 特征列序（必须与训练时一致！）
+FEATURE_COLS = [
+    'home_pts_last_3', 'home_pts_last_5', 'home_pts_last_10',
+    'home_opp_pts_last_5', 'home_pts_std_5', 'home_pts_last_5_home',
+    'away_pts_last_3', 'away_pts_last_5', 'away_pts_last_10',
+    'away_opp_pts_last_5', 'away_pts_std_5', 'away_pts_last_5_away',
+    'combined_pts_last_3', 'combined_pts_last_5', 'combined_pts_last_10',
+    'home_off_vs_away_def', 'away_off_vs_home_def', 'home_field_advantage',
+    'home_injury_impact', 'away_injury_impact',
+]
+
 def build_matchup_features(home_team, away_team, injuries_df):
-    """构建对阵特征（V3含伤病）"""
+    """构建对阵特征（V3含伤病），返回按训练列序排好的 (1, 20) float32数组"""
     print(f"\n🔧 构建特征: {home_team} vs {away_team}...")
     
     # 获取两队统计
@@ -161,19 +262,32 @@ def build_matchup_features(home_team, away_team, injuries_df):
     print(f"   客队近5场均分: {away_stats['pts_last_5']:.1f}")
     print(f"   组合预期: {features['combined_pts_last_5']:.1f}")
     print(f"   伤病总影响: -{home_injury + away_injury:.1f}分")
-    
-    return pd.DataFrame([features])
 
-def make_prediction(model_package, features_df, calibration=0):
+    # 直接按训练列序组一行float32；单行DataFrame + 列重排在sklearn内部
+    # 还要再抽一次ndarray，批量预测时是纯pandas开销
+    return np.array([[features[c] for c in FEATURE_COLS]], dtype=np.float32)
+
+# 同一对阵+同一版伤病CSV的特征帧直接复用；mtime变了key就变，自动失效。
+# 同日重跑/开发迭代时免掉重复的CSV读和rolling计算
+@lru_cache(maxsize=128)
+def _build_matchup_features_keyed(home_team, away_team, injuries_mtime_ns):
+    return build_matchup_features(home_team, away_team, load_injuries())
+
+def build_matchup_features_cached(home_team, away_team):
+    """build_matchup_features的记忆化入口，伤病数据取injuries_latest.csv"""
+    filepath = INJURIES_DIR / 'injuries_latest.csv'
+    mtime_ns = filepath.stat().st_mtime_ns if filepath.exists() else 0
+    return _build_matchup_features_keyed(home_team, away_team, mtime_ns)
+
+def make_prediction(model_package, features, calibration=0):
     """预测并给出建议"""
-    model = model_package['model']
-    feature_cols = model_package['feature_cols']
-    
-    # 确保特征顺序一致
-    X = features_df[feature_cols]
-    
-    # 预测
-    predicted_total = model.predict(X)[0]
+    # features已按FEATURE_COLS列序组好，直接喂ndarray，跳过check_array的DataFrame路径
+    sess = model_package.get('onnx_session')
+    if sess is not None:
+        input_name = sess.get_inputs()[0].name
+        predicted_total = float(sess.run(None, {input_name: features})[0].ravel()[0])
+    else:
+        predicted_total = model_package['model'].predict(features)[0]
     
     # 应用校准修正（默认+2.7分修正系统性低估）
     if calibration != 0:
@@ -188,13 +302,16 @@ def generate_recommendation(predicted_total, lines=[215, 220, 225, 230]):
     print(f"{'盘口':>8s} {'预测':>10s} {'建议':>10s} {'偏离':>10s} {'信心度':>10s} {'决策':>15s}")
     print("-" * 70)
     
+    # 偏离/信心度一次数组运算算完，循环里只剩格式化
+    lines_arr = np.asarray(lines, dtype=float)
+    deviations = predicted_total - lines_arr
+    confidences = np.abs(deviations) / lines_arr * 100
+
     recommendations = []
-    
-    for line in lines:
-        prediction = 'OVER' if predicted_total > line else 'UNDER'
-        deviation = predicted_total - line
-        confidence = abs(deviation) / line * 100
-        
+
+    for line, deviation, confidence in zip(lines, deviations, confidences):
+        prediction = 'OVER' if deviation > 0 else 'UNDER'
+
         # 决策逻辑（10%阈值优化）
         if confidence >= 10:
             decision = "🏆 强烈推荐"  # 77.8%准确率, +48.5% ROI
@@ -225,7 +342,7 @@ def generate_recommendation(predicted_total, lines=[215, 220, 225, 230]):
     else:
         print(f"\n   ❌ 无推荐下注 - 最高信心度仅{best['confidence']:.1f}% (低于6%阈值)")
 
-def predict_matchup(home_team, away_team, calibration=0):
+def predict_matchup(home_team, away_team, calibration=0, as_json=False):
     """预测单场比赛"""
     print("\n" + "="*70)
     print(f"🏀 NBA大小分预测 V3: {home_team} vs {away_team}")
@@ -249,7 +366,15 @@ def predict_matchup(home_team, away_team, calibration=0):
     
     # 预测
     predicted_total = make_prediction(model_package, features_df, calibration=calibration)
-    
+
+    # 机器可读输出：外部调用方只解析最后一行JSON，不用全文扫中文标签
+    if as_json:
+        print(json.dumps({
+            'home': home_team, 'away': away_team,
+            'predicted_total': float(predicted_total),
+        }))
+        return
+
     # 建议
     generate_recommendation(predicted_total)
     
@@ -269,11 +394,14 @@ def main():
     parser = argparse.ArgumentParser(description='NBA大小分预测 V3 (伤病增强版)')
     parser.add_argument('--home', required=True, help='主队缩写 (e.g., LAL)')
     parser.add_argument('--away', required=True, help='客队缩写 (e.g., GS)')
-    parser.add_argument('--calibration', type=float, default=2.7, 
+    parser.add_argument('--calibration', type=float, default=2.7,
                         help='校准因子（默认+2.7分修正系统性低估，设为0禁用）')
+    parser.add_argument('--json', action='store_true',
+                        help='最后一行输出机器可读JSON（供外部脚本解析）')
     args = parser.parse_args()
-    
-    predict_matchup(args.home.upper(), args.away.upper(), calibration=args.calibration)
+
+    predict_matchup(args.home.upper(), args.away.upper(),
+                    calibration=args.calibration, as_json=args.json)
 
 if __name__ == '__main__':
     # 如果没有参数，运行示例
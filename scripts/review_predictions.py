@@ -4,7 +4,23 @@
 对比预测值与实际比分
 """
 import json
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+
+# orjson解析比stdlib json快3-10x（ESPN scoreboard响应可达数MB）；没装就退回
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def _dumps_indented(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode('utf-8')
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -13,6 +29,20 @@ PROJECT_ROOT = Path(__file__).parent.parent
 PREDICTIONS_DIR = PROJECT_ROOT / 'data' / 'predictions'
 REVIEWS_DIR = PROJECT_ROOT / 'data' / 'reviews'
 REVIEWS_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_DIR = PROJECT_ROOT / 'data' / 'cache'
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# 比赛进行中比分10分钟内复用；全部完赛后永久有效
+SCORE_CACHE_TTL = 600
+
+# 连接池 + 自动退避重试
+_SESSION = requests.Session()
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=4, pool_maxsize=8,
+    max_retries=requests.adapters.Retry(total=3, backoff_factor=0.5),
+)
+_SESSION.mount('https://', _adapter)
+_SESSION.mount('http://', _adapter)
 
 def load_predictions(date_str):
     """加载预测记录"""
@@ -22,20 +52,29 @@ def load_predictions(date_str):
         print(f"❌ 预测文件不存在: {filepath}")
         return None
     
-    with open(filepath, 'r') as f:
-        predictions = json.load(f)
-    
+    with open(filepath, 'rb') as f:
+        predictions = _loads(f.read())
+
     return predictions
 
 def get_actual_scores(date_str):
-    """获取实际比分"""
+    """获取实际比分（带磁盘缓存：重跑回顾不再重复打ESPN）"""
+    cache_path = CACHE_DIR / f'espn_scores_{date_str}.json'
+    if cache_path.exists():
+        with open(cache_path, 'rb') as f:
+            cached = _loads(f.read())
+        age = time.time() - cache_path.stat().st_mtime
+        # 完赛日期的比分不会再变；未完赛走TTL
+        if cached.get('final') or age < SCORE_CACHE_TTL:
+            return cached['scores']
+
     url = f"http://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard?dates={date_str}"
-    
+
     try:
-        response = requests.get(url, timeout=10)
-        data = response.json()
+        response = _SESSION.get(url, timeout=10)
+        data = _loads(response.content)
         events = data.get('events', [])
-        
+
         scores = {}
         for event in events:
             comp = event['competitions'][0]
@@ -56,13 +95,23 @@ def get_actual_scores(date_str):
                     'away_score': away_score,
                     'total_score': total_score
                 }
-        
+
+        final = bool(events) and len(scores) == len(events)
+        with open(cache_path, 'wb') as f:
+            f.write(orjson.dumps({'final': final, 'scores': scores}) if orjson is not None
+                    else json.dumps({'final': final, 'scores': scores}).encode('utf-8'))
+
         return scores
-    
+
     except Exception as e:
         print(f"❌ 获取比分失败: {e}")
         return {}
 
+def prefetch_scores(date_strs):
+    """并发预取多个日期的比分：网络延迟重叠，之后逐日回顾全部命中磁盘缓存"""
+    with ThreadPoolExecutor(max_workers=min(8, len(date_strs))) as ex:
+        list(ex.map(get_actual_scores, date_strs))
+
 def analyze_predictions(predictions, actual_scores):
     """分析预测准确率"""
     results = []
@@ -157,13 +206,14 @@ def generate_review_report(date_str, results):
     # 详细结果
     msg += f"📋 **详细结果**:\n\n"
     
-    for _, row in df.iterrows():
-        emoji = "✅" if row['correct'] else "❌"
-        priority_emoji = "🏆" if row['priority'] >= 4 else "⭐" if row['priority'] >= 3 else "📌"
-        
-        msg += f"{emoji} {priority_emoji} {row['away_team']} @ {row['home_team']}\n"
-        msg += f"   预测: {row['predicted_total']:.1f} | 实际: {row['actual_total']} ({row['home_score']}-{row['away_score']})\n"
-        msg += f"   推荐: 盘口{row['best_line']} {row['best_prediction']} ({row['best_confidence']:.1f}%) | 误差: {row['error']:.1f}分\n\n"
+    # itertuples返回namedtuple，不像iterrows那样逐行装箱成Series
+    for row in df.itertuples(index=False):
+        emoji = "✅" if row.correct else "❌"
+        priority_emoji = "🏆" if row.priority >= 4 else "⭐" if row.priority >= 3 else "📌"
+
+        msg += f"{emoji} {priority_emoji} {row.away_team} @ {row.home_team}\n"
+        msg += f"   预测: {row.predicted_total:.1f} | 实际: {row.actual_total} ({row.home_score}-{row.away_score})\n"
+        msg += f"   推荐: 盘口{row.best_line} {row.best_prediction} ({row.best_confidence:.1f}%) | 误差: {row.error:.1f}分\n\n"
     
     # 改进建议
     msg += f"💡 **改进建议**:\n"
@@ -189,8 +239,8 @@ def save_review(date_str, results, report):
         'report': report
     }
     
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2)
+    with open(filepath, 'wb') as f:
+        f.write(_dumps_indented(data))
     
     print(f"💾 回顾已保存: {filepath}")
 
@@ -198,16 +248,24 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='回顾预测准确率')
-    parser.add_argument('--date', help='日期 (YYYYMMDD), 默认今天', default=None)
+    parser.add_argument('--date', help='日期 (YYYYMMDD，逗号分隔可多日), 默认今天', default=None)
     parser.add_argument('--telegram', action='store_true', help='输出Telegram格式')
     args = parser.parse_args()
-    
+
     # 确定日期
     if args.date:
-        date_str = args.date
+        dates = args.date.split(',')
     else:
-        date_str = datetime.now().strftime('%Y%m%d')
-    
+        dates = [datetime.now().strftime('%Y%m%d')]
+
+    # 多日回顾时先并发拉比分，后面循环串行只做分析
+    if len(dates) > 1:
+        prefetch_scores(dates)
+
+    for date_str in dates:
+        review_one_date(date_str, telegram=args.telegram)
+
+def review_one_date(date_str, telegram=False):
     print("\n" + "="*70)
     print(f"📊 NBA预测回顾 - {date_str}")
     print("="*70 + "\n")
@@ -242,7 +300,7 @@ def main():
     save_review(date_str, results, report)
     
     # 输出报告
-    if args.telegram:
+    if telegram:
         print(f"\n📱 Telegram消息格式:\n")
         print("="*70)
         print(report)
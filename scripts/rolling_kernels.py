@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+numba滑动窗口内核 - 按球队分段一次流式算完 mean/std/shift
+
+pandas路径每个窗口每列都要扫一遍数据（v2是9遍）；这里把排序后的
+PTS/OPP_PTS当成连续numpy数组，按球队切片用prange并行，一遍算出
+滑动均值+标准差，并直接把结果写到shift(1)后的位置。
+没装numba时HAS_NUMBA=False，调用方退回pandas路径。
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def team_segments(teams):
+    """排序后的球队列 → 每队连续切片的(starts, ends)"""
+    change = np.empty(len(teams), dtype=np.bool_)
+    change[0] = True
+    change[1:] = teams[1:] != teams[:-1]
+    starts = np.flatnonzero(change)
+    ends = np.append(starts[1:], len(teams))
+    return starts, ends
+
+
+if HAS_NUMBA:
+
+    @njit(parallel=True, cache=True)
+    def _rolling_pack(pts, opp, starts, ends, w, out_pts, out_opp, out_std):
+        for t in prange(len(starts)):
+            s, e = starts[t], ends[t]
+            for i in range(s, e):
+                lo = max(s, i - w + 1)
+                n = i - lo + 1
+                acc = 0.0
+                acc_opp = 0.0
+                for j in range(lo, i + 1):
+                    acc += pts[j]
+                    acc_opp += opp[j]
+                mean = acc / n
+                # 样本标准差（ddof=1），窗口不足2场时为NaN
+                if n >= 2:
+                    var = 0.0
+                    for j in range(lo, i + 1):
+                        d = pts[j] - mean
+                        var += d * d
+                    std = np.sqrt(var / (n - 1))
+                else:
+                    std = np.nan
+                # shift(1)：结果写到下一行，开赛前只看历史
+                if i + 1 < e:
+                    out_pts[i + 1] = mean
+                    out_opp[i + 1] = acc_opp / n
+                    out_std[i + 1] = std
+
+    @njit(parallel=True, cache=True)
+    def _rolling_mean_shift(values, starts, ends, w, out):
+        for t in prange(len(starts)):
+            s, e = starts[t], ends[t]
+            for i in range(s, e):
+                lo = max(s, i - w + 1)
+                acc = 0.0
+                for j in range(lo, i + 1):
+                    acc += values[j]
+                if i + 1 < e:
+                    out[i + 1] = acc / (i - lo + 1)
+
+
+def team_rolling_stats(df, windows):
+    """
+    一次pass算出全部窗口的 pts_last_w / opp_pts_last_w / pts_std_w（含shift）
+
+    df必须已按 ['TEAM_ABBREVIATION', 'GAME_DATE'] 排序。
+    返回 {列名: ndarray}；没装numba时返回None。
+    """
+    if not HAS_NUMBA:
+        return None
+
+    teams = df['TEAM_ABBREVIATION'].to_numpy()
+    starts, ends = team_segments(teams)
+    pts = df['PTS'].to_numpy(dtype=np.float64)
+    opp = df['OPP_PTS'].to_numpy(dtype=np.float64)
+
+    out = {}
+    for w in windows:
+        out_pts = np.full(len(teams), np.nan)
+        out_opp = np.full(len(teams), np.nan)
+        out_std = np.full(len(teams), np.nan)
+        _rolling_pack(pts, opp, starts, ends, w, out_pts, out_opp, out_std)
+        out[f'pts_last_{w}'] = out_pts
+        out[f'opp_pts_last_{w}'] = out_opp
+        out[f'pts_std_{w}'] = out_std
+    return out
+
+
+def team_rolling_mean(df, column, window):
+    """单列滑动均值+shift(1)（v4的pace等额外列用）；没装numba时返回None"""
+    if not HAS_NUMBA:
+        return None
+
+    teams = df['TEAM_ABBREVIATION'].to_numpy()
+    starts, ends = team_segments(teams)
+    values = df[column].to_numpy(dtype=np.float64)
+    out = np.full(len(teams), np.nan)
+    _rolling_mean_shift(values, starts, ends, window, out)
+    return out
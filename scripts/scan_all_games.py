@@ -3,10 +3,29 @@
 扫描所有今日/明日NBA比赛，对比真实盘口，生成下注建议
 """
 import json
-import subprocess
 import os
 import sys
 
+# orjson解析快3-10x；没装就退回stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+from pathlib import Path
+
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'scripts'))
+
+# 进程内直接调预测：不再每场spawn一个python3 -> 重新import pandas/xgboost
+# -> 反序列化模型 -> 文本解析stdout（每场好几秒的固定启动开销）
+from predict_v3 import load_model, load_injuries, build_matchup_features
+
 # NBA队伍简称映射
 TEAM_MAP = {
     "Atlanta Hawks": "ATL", "Boston Celtics": "BOS", "Brooklyn Nets": "BKN",
@@ -22,10 +41,13 @@ TEAM_MAP = {
 }
 
 def get_avg_line(odds_file):
-    """从盘口文件获取每场平均line"""
-    with open(odds_file) as f:
-        records = json.load(f)
-    
+    """从盘口文件获取每场平均line（兼容旧版.json和追加式.ndjson）"""
+    with open(odds_file, 'rb') as f:
+        if odds_file.endswith(".ndjson"):
+            records = [_loads(line) for line in f if line.strip()]
+        else:
+            records = _loads(f.read())
+
     games = {}
     for r in records:
         key = (r.get("away_team", ""), r.get("home_team", ""))
@@ -46,24 +68,46 @@ def get_avg_line(odds_file):
         }
     return result
 
-def run_prediction(home, away):
-    """运行V3预测"""
-    cmd = f"cd /Users/tmtat/projects/nba && python3 scripts/predict_v3.py --home {home} --away {away} 2>&1"
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    output = result.stdout + result.stderr
-    
-    for line in output.split('\n'):
-        if '预测总分:' in line:
-            try:
-                return float(line.split(':')[1].strip())
-            except:
-                pass
-    return None
+def _build_features_safe(game_key, info, injuries_df):
+    try:
+        return build_matchup_features(info["home"], info["away"], injuries_df)
+    except Exception as e:
+        print(f"⚠️  特征构建失败 {game_key}: {e}")
+        return None
+
+def run_predictions(games, model_package, injuries_df, calibration=2.7):
+    """批量运行V3预测，返回 {game_key: 预测总分}
+
+    calibration默认2.7，与predict_v3.py CLI默认一致（此前走子进程
+    解析CLI输出时就带着这个校准）
+    """
+    # 逐场特征构建相互独立，线程池并发（首场之后都命中进程内缓存，
+    # ex.map保持与ordered一致的顺序）
+    ordered = sorted(games.items())
+    with ThreadPoolExecutor(max_workers=min(8, max(1, len(ordered)))) as ex:
+        feature_frames = list(ex.map(
+            lambda kv: _build_features_safe(kv[0], kv[1], injuries_df), ordered))
+
+    # 所有场次拼成一个batch，model.predict只调一次；
+    # 树模型的predict自己会跨核并行
+    model = model_package['model']
+    if hasattr(model, 'n_jobs'):
+        model.n_jobs = -1
+
+    predictions = {}
+    valid = [i for i, f in enumerate(feature_frames) if f is not None]
+    if valid:
+        # 特征行已是按列序排好的float32数组，vstack后直接喂predict
+        X_all = np.vstack([feature_frames[i] for i in valid])
+        preds = model_package['model'].predict(X_all) + calibration
+        for i, pred in zip(valid, preds):
+            predictions[ordered[i][0]] = float(pred)
+    return predictions
 
 def main():
     # 找最新的odds文件
-    odds_dir = "/Users/tmtat/projects/nba/data/odds"
-    odds_files = sorted([f for f in os.listdir(odds_dir) if f.startswith("odds_") and f.endswith(".json")])
+    odds_dir = str(PROJECT_ROOT / "data" / "odds")
+    odds_files = sorted([f for f in os.listdir(odds_dir) if f.startswith("odds_") and f.endswith((".json", ".ndjson"))])
     if not odds_files:
         print("❌ 无盘口数据")
         return
@@ -73,15 +117,22 @@ def main():
     
     games = get_avg_line(odds_file)
     print(f"🏀 共 {len(games)} 场比赛\n")
-    
+
+    # 模型和伤病数据整个扫描只加载一次
+    model_package = load_model()
+    if not model_package:
+        return
+    injuries_df = load_injuries()
+    predictions = run_predictions(games, model_package, injuries_df)
+
     MAE = 17.09
     results = []
-    
+
     print(f"{'比赛':<15} {'盘口':>6} {'预测':>6} {'偏离':>7} {'信心(L)':>8} {'信心(M)':>8} {'建议':>8}")
     print("-" * 72)
-    
+
     for game_key, info in sorted(games.items()):
-        pred = run_prediction(info["home"], info["away"])
+        pred = predictions.get(game_key)
         if pred is None:
             print(f"{game_key:<15} {info['avg_line']:>6.1f} {'FAIL':>6} {'':>7} {'':>8} {'':>8} {'跳过':>8}")
             continue
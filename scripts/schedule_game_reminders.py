@@ -4,20 +4,67 @@
 使用OpenClaw cron系统
 """
 import json
+import time
 import requests
+
+# orjson编解码比stdlib json快3-10x；没装就退回
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def _dumps(obj):
+    return orjson.dumps(obj) if orjson is not None else json.dumps(obj).encode('utf-8')
+
 import subprocess
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from zoneinfo import ZoneInfo
+
+ADELAIDE_TZ = ZoneInfo('Australia/Adelaide')
+REMIND_DELTA = timedelta(minutes=20)  # 提前20分钟提醒
 
 PROJECT_ROOT = Path(__file__).parent.parent
+CACHE_DIR = PROJECT_ROOT / 'data' / 'espn_cache'
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# ESPN scoreboard偶尔慢到几秒；TTL内重跑直接读磁盘缓存
+SCOREBOARD_TTL = 300
+
+# 连接池 + 自动退避重试：同主机多次请求复用TCP/TLS握手
+_SESSION = requests.Session()
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=4, pool_maxsize=8,
+    max_retries=requests.adapters.Retry(total=3, backoff_factor=0.5),
+)
+_SESSION.mount('https://', _adapter)
+_SESSION.mount('http://', _adapter)
+
+def _fetch_scoreboard(date_str):
+    """scoreboard原始响应的TTL磁盘缓存"""
+    cache_path = CACHE_DIR / f'{date_str}.json'
+    if cache_path.exists() and time.time() - cache_path.stat().st_mtime < SCOREBOARD_TTL:
+        with open(cache_path, 'rb') as f:
+            return _loads(f.read())
+
+    url = f"http://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard?dates={date_str}"
+    response = _SESSION.get(url, timeout=10)
+    response.raise_for_status()
+    data = _loads(response.content)
+
+    with open(cache_path, 'wb') as f:
+        f.write(_dumps(data))
+
+    return data
 
 def get_games_for_date(date_str):
     """获取指定日期的比赛"""
-    url = f"http://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard?dates={date_str}"
-    
     try:
-        response = requests.get(url, timeout=10)
-        data = response.json()
+        data = _fetch_scoreboard(date_str)
         events = data.get('events', [])
         
         games = []
@@ -27,14 +74,14 @@ def get_games_for_date(date_str):
             home = comp['competitors'][0] if comp['competitors'][0]['homeAway'] == 'home' else comp['competitors'][1]
             away = comp['competitors'][1] if comp['competitors'][1]['homeAway'] == 'away' else comp['competitors'][0]
             
-            # 比赛时间（UTC）
-            game_time = datetime.strptime(event['date'], '%Y-%m-%dT%H:%M%SZ')
-            
-            # 转换到Adelaide时间
-            adelaide_time = game_time + timedelta(hours=10, minutes=30)
+            # 比赛时间（UTC）。fromisoformat是C实现，比strptime快且不怕格式typo
+            game_time = datetime.fromisoformat(event['date'].replace('Z', '+00:00'))
+
+            # 转换到Adelaide时间（zoneinfo自动处理夏令时，固定+10:30半年是错的）
+            adelaide_time = game_time.astimezone(ADELAIDE_TZ)
             
-            # 提醒时间（提前20分钟）
-            reminder_time = adelaide_time - timedelta(minutes=20)
+            # 提醒时间
+            reminder_time = adelaide_time - REMIND_DELTA
             
             games.append({
                 'game_id': event['id'],
@@ -99,8 +146,8 @@ def add_cron_job_via_cli(job):
     """通过OpenClaw CLI添加cron任务"""
     try:
         # 将job转为JSON
-        job_json = json.dumps(job)
-        
+        job_json = _dumps(job).decode('utf-8')
+
         # 调用openclaw cron add
         result = subprocess.run(
             ['openclaw', 'cron', 'add'],
@@ -118,6 +165,39 @@ def add_cron_job_via_cli(job):
     except Exception as e:
         return False, str(e)
 
+def add_cron_jobs_via_cli(jobs):
+    """批量添加cron任务：优先一次--batch提交（一个进程搞定全部，
+    省掉每场一次fork/exec+超时等待），CLI不支持时逐个退回"""
+    if not jobs:
+        return 0, []
+
+    try:
+        result = subprocess.run(
+            ['openclaw', 'cron', 'add', '--batch', '-'],
+            input=_dumps({'jobs': jobs}).decode('utf-8'),
+            text=True,
+            capture_output=True,
+            timeout=30
+        )
+        if result.returncode == 0:
+            return len(jobs), []
+    except Exception:
+        pass
+
+    # 旧版CLI没有--batch：逐个提交。每次subprocess.run最坏要等10s超时，
+    # 各任务相互独立，线程池并发等待（子进程IO等待不占GIL）
+    added = 0
+    failures = []
+    with ThreadPoolExecutor(max_workers=min(8, len(jobs))) as ex:
+        results = list(ex.map(add_cron_job_via_cli, jobs))
+    for job, (success, output) in zip(jobs, results):
+        if success:
+            added += 1
+        else:
+            failures.append((job['name'], output))
+
+    return added, failures
+
 def main():
     import argparse
     
@@ -150,39 +230,36 @@ def main():
     # 为每场比赛创建提醒
     print(f"⏰ 创建提醒任务...\n")
     
+    # 先收集全部任务定义，循环结束后一次性提交（不在循环里逐个spawn CLI）
     jobs_created = []
     jobs_added = 0
-    
+
     for i, game in enumerate(games, 1):
-        # 只为未来的比赛创建提醒
-        if game['reminder_time'] > datetime.now():
+        # 只为未来的比赛创建提醒（两边都是aware时间，避免naive/aware混比）
+        if game['reminder_time'] > datetime.now(timezone.utc):
             job = create_reminder_job(game)
-            
+
             print(f"[{i}/{len(games)}] {game['away_team']} @ {game['home_team']}")
             print(f"  开赛: {game['game_time_adelaide'].strftime('%H:%M')}")
-            print(f"  提醒: {game['reminder_time'].strftime('%H:%M')}")
-            
-            if not args.dry_run:
-                # 实际添加到OpenClaw cron
-                success, output = add_cron_job_via_cli(job)
-                
-                if success:
-                    print(f"  ✅ 已添加到cron系统\n")
-                    jobs_added += 1
-                else:
-                    print(f"  ❌ 添加失败: {output[:100]}\n")
-            else:
-                print(f"  💾 已生成定义（dry-run模式）\n")
-            
+            print(f"  提醒: {game['reminder_time'].strftime('%H:%M')}\n")
+
             jobs_created.append(job)
         else:
             print(f"[{i}/{len(games)}] {game['away_team']} @ {game['home_team']} - 已过期，跳过\n")
+
+    if not args.dry_run and jobs_created:
+        print(f"📤 提交 {len(jobs_created)} 个提醒任务...")
+        jobs_added, failures = add_cron_jobs_via_cli(jobs_created)
+        for name, output in failures:
+            print(f"  ❌ 添加失败 {name}: {output[:100]}")
     
-    # 保存所有job定义（备份）
+    # 保存所有job定义（备份）。JSONL每行一个job：逐行写不用攒整块
+    # indent缓冲，文件也能tail/流式读
     if jobs_created:
-        jobs_file = PROJECT_ROOT / 'data' / f'reminder_jobs_{date_str}.json'
-        with open(jobs_file, 'w') as f:
-            json.dump(jobs_created, f, indent=2)
+        jobs_file = PROJECT_ROOT / 'data' / f'reminder_jobs_{date_str}.jsonl'
+        with open(jobs_file, 'wb') as f:
+            for job in jobs_created:
+                f.write(_dumps(job) + b'\n')
         
         print(f"💾 任务定义已保存: {jobs_file}")
     
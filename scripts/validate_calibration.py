@@ -2,13 +2,19 @@
 """
 验证校准效果 - 对比V3原始 vs V3校准版的准确率和ROI
 """
+import hashlib
 import pandas as pd
+import numpy as np
 import pickle
 from pathlib import Path
 
+from _calibration_eval import LINES, evaluate_np
+
 PROJECT_ROOT = Path(__file__).parent.parent
 MODELS_DIR = PROJECT_ROOT / 'models'
 DATA_DIR = PROJECT_ROOT / 'data'
+CACHE_DIR = DATA_DIR / 'cache'
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 def load_model():
     """加载V3模型"""
@@ -18,48 +24,36 @@ def load_model():
 
 def load_features():
     """加载特征数据"""
-    filepath = DATA_DIR / 'features' / 'features_v3.csv'
-    return pd.read_csv(filepath)
+    filepath = DATA_DIR / 'features' / 'features_v3.parquet'
+    if filepath.exists():
+        return pd.read_parquet(filepath)
+    df = pd.read_csv(filepath.with_suffix('.csv'))
+    try:
+        # 首次读CSV后落一份parquet缓存，之后的加载走列式解码
+        df.to_parquet(filepath)
+    except Exception:
+        pass
+    return df
 
-def evaluate_predictions(df, calibration=0):
-    """评估预测准确率和ROI"""
-    # Line 215准确率
-    correct_215 = sum((df['total_points'] > 215) == (df['predicted'] > 215))
-    accuracy_215 = correct_215 / len(df) * 100
-    
-    # Line 220
-    correct_220 = sum((df['total_points'] > 220) == (df['predicted'] > 220))
-    accuracy_220 = correct_220 / len(df) * 100
-    
-    # Line 225
-    correct_225 = sum((df['total_points'] > 225) == (df['predicted'] > 225))
-    accuracy_225 = correct_225 / len(df) * 100
-    
-    # 高信心下注模拟（>5%）
-    df['confidence'] = abs(df['predicted'] - 215) / 215 * 100
-    high_conf = df[df['confidence'] > 5].copy()
-    
-    if len(high_conf) > 0:
-        correct_hc = sum((high_conf['total_points'] > 215) == (high_conf['predicted'] > 215))
-        accuracy_hc = correct_hc / len(high_conf) * 100
-        roi_hc = (correct_hc - len(high_conf)) / len(high_conf) * 95  # -5% vig
-    else:
-        accuracy_hc = 0
-        roi_hc = 0
-    
-    # MAE
-    mae = df['error'].abs().mean()
-    
-    return {
-        'accuracy_215': accuracy_215,
-        'accuracy_220': accuracy_220,
-        'accuracy_225': accuracy_225,
-        'high_conf_games': len(high_conf),
-        'high_conf_accuracy': accuracy_hc,
-        'roi': roi_hc,
-        'mae': mae,
-        'avg_error': df['error'].mean()  # 平均偏差（正=高估，负=低估）
-    }
+def _predict_raw(model_pkg, X, feature_cols):
+    """原始预测的.npy磁盘缓存：模型和特征文件都没变时跳过整个推理pass
+    （校准版只是在原始预测上+2.7，不需要第二次推理）"""
+    model_path = MODELS_DIR / 'total_points_model_v3.pkl'
+    feat_path = DATA_DIR / 'features' / 'features_v3.parquet'
+    if not feat_path.exists():
+        feat_path = feat_path.with_suffix('.csv')
+
+    key_src = (f"{model_path.stat().st_mtime_ns}:{feat_path.stat().st_mtime_ns}:"
+               + ','.join(feature_cols))
+    key = hashlib.md5(key_src.encode()).hexdigest()[:12]
+    cache_path = CACHE_DIR / f'v3_raw_preds_{key}.npy'
+
+    if cache_path.exists():
+        return np.load(cache_path)
+
+    y_pred = model_pkg['model'].predict(X)
+    np.save(cache_path, y_pred)
+    return y_pred
 
 def main():
     print("\n" + "="*70)
@@ -75,30 +69,24 @@ def main():
     
     # 准备特征
     feature_cols = model_pkg['feature_cols']
-    X = features_df[feature_cols].fillna(0)
+    # dropna后往往已无NaN：先用一次isna扫描探测，能省就省掉
+    # fillna(0)那次O(N·D)的整块拷贝
+    sub = features_df[feature_cols]
+    X = sub if not sub.isna().any().any() else sub.fillna(0)
     y_true = features_df['total_points']
     
-    # 原始预测
-    y_pred_raw = model_pkg['model'].predict(X)
-    
+    # 原始预测（带磁盘缓存）
+    y_pred_raw = _predict_raw(model_pkg, X, feature_cols)
+
     # 校准预测
     y_pred_calibrated = y_pred_raw + 2.7
-    
-    # 评估原始版
-    df_raw = pd.DataFrame({
-        'total_points': y_true,
-        'predicted': y_pred_raw,
-        'error': y_true - y_pred_raw
-    })
-    results_raw = evaluate_predictions(df_raw)
-    
-    # 评估校准版
-    df_cal = pd.DataFrame({
-        'total_points': y_true,
-        'predicted': y_pred_calibrated,
-        'error': y_true - y_pred_calibrated
-    })
-    results_cal = evaluate_predictions(df_cal, calibration=2.7)
+
+    # y侧的>L布尔两次评估共用，只算一次；不再为每个版本建整张DataFrame
+    y_np = y_true.to_numpy()
+    y_gt = y_np[:, None] > LINES
+
+    results_raw = evaluate_np(y_np, y_pred_raw, y_gt)
+    results_cal = evaluate_np(y_np, y_pred_calibrated, y_gt)
     
     # 对比表格
     print(f"{'指标':<25s} {'V3原始':<15s} {'V3校准(+2.7)':<15s} {'改进':<10s}")
